@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.firebase import firebase_auth
+from services.firebase import get_auth
+from services.auth import verify_id_token
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -25,7 +26,7 @@ def signup(request: SignUpRequest):
     Create a new user in Firebase Auth
     """
     try:
-        user = firebase_auth.create_user(
+        user = get_auth().create_user(
             email=request.email,
             password=request.password
         )
@@ -40,7 +41,7 @@ def login(request: LoginRequest):
     Backend cannot issue tokens; frontend should use Firebase SDK
     """
     try:
-        user = firebase_auth.get_user_by_email(request.email)
+        user = get_auth().get_user_by_email(request.email)
         return {
             "uid": user.uid,
             "email": user.email,
@@ -56,7 +57,7 @@ def verify_token(request: VerifyTokenRequest):
     Verify ID token sent from frontend
     """
     try:
-        decoded_token = firebase_auth.verify_id_token(request.id_token)
+        decoded_token = verify_id_token(request.id_token)
         return {"uid": decoded_token["uid"], "email": decoded_token.get("email")}
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException
+import os
+import json
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from datetime import datetime
 from services.firebase import get_db
 from services.azure_safety import analyze_content
-from google.cloud.firestore import Increment
+from services.cache import StaleWhileRevalidate
+from services.counters import UnknownDocument, increment, add_shard_totals
+from services.metrics import track_call
 from models.schemas import CommunityStoryCreate
 
 router = APIRouter(
@@ -13,24 +19,50 @@ router = APIRouter(
 # ----------------------------
 # GET COMMUNITY STORIES
 # ----------------------------
-@router.get("/fetch/stories")
-def get_community_stories():
+def _load_feed():
     db = get_db()
 
-    stories = (
+    query = (
         db.collection("community_stories")
         .where("moderation_status", "==", "auto_approved")
         .order_by("created_at", direction="DESCENDING")
         .limit(50)
-        .stream()
     )
 
-    return {
-        "stories": [
-            {"id": doc.id, **doc.to_dict()}
-            for doc in stories
-        ]
-    }
+    with track_call("firestore", "community_feed"):
+        payload = {
+            "stories": add_shard_totals(
+                "community_stories",
+                [{"id": doc.id, **doc.to_dict()} for doc in query.stream()],
+                ("likes", "saved")
+            )
+        }
+
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return payload, etag
+
+
+# The feed is identical for everyone, so one shared copy serves all users
+feed_cache = StaleWhileRevalidate(
+    _load_feed,
+    ttl=float(os.getenv("COMMUNITY_FEED_TTL", "15")),
+    stale_ttl=float(os.getenv("COMMUNITY_FEED_STALE_TTL", "60")),
+    name="community-feed"
+)
+
+
+@router.get("/fetch/stories")
+def get_community_stories(request: Request, response: Response):
+    payload, etag = feed_cache.get()
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return payload
 
 
 # ----------------------------
@@ -64,6 +96,7 @@ def submit_story(payload: CommunityStoryCreate):
     }
 
     doc_ref.set(story_data)
+    feed_cache.invalidate()
 
     return {
         "message": "Story posted successfully",
@@ -72,16 +105,21 @@ def submit_story(payload: CommunityStoryCreate):
     }
 
 
+def _increment_story(story_id: str, field: str):
+    try:
+        increment("community_stories", story_id, field)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid story id")
+    except UnknownDocument:
+        raise HTTPException(status_code=404, detail="Story not found")
+
+
 # ----------------------------
 # LIKE STORY
 # ----------------------------
 @router.post("/story/like")
 def like_story(story_id: str):
-    db = get_db()
-
-    db.collection("community_stories") \
-      .document(story_id) \
-      .update({"likes": Increment(1)})
+    _increment_story(story_id, "likes")
 
     return {
         "message": "Story liked",
@@ -94,11 +132,7 @@ def like_story(story_id: str):
 # ----------------------------
 @router.post("/story/save")
 def save_story(story_id: str):
-    db = get_db()
-
-    db.collection("community_stories") \
-      .document(story_id) \
-      .update({"saved": Increment(1)})
+    _increment_story(story_id, "saved")
 
     return {
         "message": "Story saved",
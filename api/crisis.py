@@ -1,9 +1,15 @@
+import asyncio
+import logging
 from fastapi import APIRouter, Depends
 from datetime import datetime
-from services.firebase import get_db
+from services.firebase import get_async_db
 from services.auth import verify_firebase_token
+from services.safety_plans import get_safety_plan
+from services.metrics import track_call
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/crisis",
     tags=["Crisis Mode"]
@@ -18,45 +24,75 @@ GROUNDING_STEPS = [
     "Place your feet on the ground and feel the floor beneath you."
 ]
 
-# ------------------------------------
-# START CRISIS MODE
-# ------------------------------------
-@router.post("/start")
-def start_crisis(uid: str = Depends(verify_firebase_token)):
-    db = get_db()
+# Keeps fire-and-forget log writes referenced until they finish
+_log_tasks = set()
 
-    db.collection("crisis_logs").add({
-        "uid": uid,
-        "activated_at": datetime.utcnow()
-    })
 
-    return {
-        "status": "crisis_started",
-        "activated_at": datetime.utcnow().isoformat()
-    }
+async def _write_crisis_log(uid: str, activated_at: datetime):
+    try:
+        with track_call("firestore", "crisis_log_add"):
+            await get_async_db().collection("crisis_logs").add({
+                "uid": uid,
+                "activated_at": activated_at
+            })
+    except Exception as e:
+        logger.error("Crisis log write failed", extra={"uid": uid, "error": str(e)})
 
-# ------------------------------------
-# CRISIS SUPPORT PAYLOAD
-# ------------------------------------
-@router.get("/support")
-def crisis_support(uid: str = Depends(verify_firebase_token)):
-    db = get_db()
 
-    plan_doc = db.collection("safety_plans").document(uid).get()
+def _log_crisis(uid: str) -> datetime:
+    """
+    Record a crisis activation without making the user wait for it.
+    """
+    activated_at = datetime.utcnow()
+    task = asyncio.create_task(_write_crisis_log(uid, activated_at))
+    _log_tasks.add(task)
+    task.add_done_callback(_log_tasks.discard)
+    return activated_at
 
-    if not plan_doc.exists:
+
+def _support_payload(safety_plan) -> dict:
+    if safety_plan is None:
         return {
             "status": "no_safety_plan",
             "grounding_steps": GROUNDING_STEPS,
             "message": "No safety plan found. Please create one when you feel able."
         }
 
-    safety_plan = plan_doc.to_dict()
-
     return {
         "status": "crisis_mode_active",
         "grounding_steps": GROUNDING_STEPS,
         "coping_strategies": safety_plan.get("coping_strategies", []),
         "safe_contacts": safety_plan.get("safe_contacts", []),
         "reason_to_live": safety_plan.get("reason_to_live", "")
-    }
\ No newline at end of file
+    }
+
+# ------------------------------------
+# START CRISIS MODE
+# ------------------------------------
+@router.post("/start")
+async def start_crisis(uid: str = Depends(verify_firebase_token)):
+    activated_at = _log_crisis(uid)
+
+    return {
+        "status": "crisis_started",
+        "activated_at": activated_at.isoformat()
+    }
+
+# ------------------------------------
+# CRISIS SUPPORT PAYLOAD
+# ------------------------------------
+@router.get("/support")
+async def crisis_support(uid: str = Depends(verify_firebase_token)):
+    return _support_payload(await get_safety_plan(uid))
+
+# ------------------------------------
+# START + SUPPORT IN ONE ROUND TRIP
+# ------------------------------------
+@router.post("/activate")
+async def activate_crisis(uid: str = Depends(verify_firebase_token)):
+    activated_at = _log_crisis(uid)
+
+    return {
+        **_support_payload(await get_safety_plan(uid)),
+        "activated_at": activated_at.isoformat()
+    }
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends
-from datetime import datetime, timedelta
-from collections import Counter
 
-from services.firebase import get_db
+from services.firebase import get_async_db, firestore_bulkhead
 from services.auth import verify_firebase_token
+from services.rollups import DASHBOARD_ROLLUPS, dashboard_summary, rebuild_rollups
+from services.metrics import track_call
 
 router = APIRouter(
     prefix="/dashboard",
@@ -11,82 +11,27 @@ router = APIRouter(
 )
 
 @router.get("/overview")
-def dashboard_overview(uid: str = Depends(verify_firebase_token)):
-    db = get_db()
-
-    docs = (
-        db.collection("journals")
-        .where("uid", "==", uid)
-        .order_by("created_at")
-        .stream()
-    )
-
-    journals = [doc.to_dict() for doc in docs]
-
-    if not journals:
-        return {
-            "total_journals": 0,
-            "last_journal_at": None,
-            "average_sentiment": None,
-            "mood_trend": [],
-            "risk_alert": False,
-            "top_keywords": [],
-            "top_themes": []
-        }
-
-    # -------------------------
-    # Basic stats
-    # -------------------------
-    total_journals = len(journals)
-    last_journal_at = journals[-1]["created_at"].isoformat()
-
-    # -------------------------
-    # Mood trend (0–100 scale)
-    # -------------------------
-    mood_trend = []
-    sentiment_values = []
-
-    for j in journals:
-        scores = j.get("sentiment_scores", {})
-        positive = scores.get("positive", 0)
-        negative = scores.get("negative", 0)
-
-        # Normalize: -1 → 0, 0 → 50, +1 → 100
-        score = round((positive - negative + 1) * 50, 2)
-
-        sentiment_values.append(score)
-
-        mood_trend.append({
-            "date": j["created_at"].isoformat(),
-            "score": score
-        })
-
-    avg_sentiment = round(sum(sentiment_values) / len(sentiment_values), 2)
+async def dashboard_overview(uid: str = Depends(verify_firebase_token)):
+    db = get_async_db()
 
     # -------------------------
-    # Risk alert
+    # Per-user rollup, kept current on every journal write
     # -------------------------
-    risk_alert = any(j.get("flagged", False) for j in journals)
+    with track_call("firestore", "rollup_get"):
+        doc = await db.collection(DASHBOARD_ROLLUPS).document(uid).get()
 
-    # -------------------------
-    # Keywords & themes
-    # -------------------------
-    all_keywords = []
-    all_themes = []
+    if doc.exists:
+        rollup = doc.to_dict()
+    else:
+        # First visit since rollups were introduced: backfill from journals
+        rollup = await firestore_bulkhead.run(rebuild_rollups, uid)
 
-    for j in journals:
-        all_keywords.extend(j.get("key_phrases", []))
-        all_themes.extend(j.get("themes", []))
+    return dashboard_summary(rollup)
 
-    top_keywords = [k for k, _ in Counter(all_keywords).most_common(5)]
-    top_themes = [t for t, _ in Counter(all_themes).most_common(5)]
 
-    return {
-        "total_journals": total_journals,
-        "last_journal_at": last_journal_at,
-        "average_sentiment": avg_sentiment,
-        "mood_trend": mood_trend,
-        "risk_alert": risk_alert,
-        "top_keywords": top_keywords,
-        "top_themes": top_themes
-    }
\ No newline at end of file
+@router.post("/rebuild")
+def rebuild_dashboard(uid: str = Depends(verify_firebase_token)):
+    """
+    Recompute the caller's rollups from their journals.
+    """
+    return dashboard_summary(rebuild_rollups(uid))
@@ -1,22 +1,42 @@
-from fastapi import APIRouter, Depends
+import json
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from services.firebase import get_db
+from services.firebase import get_db, get_async_db, firestore_bulkhead
+from services.bulkheads import BulkheadFull
 from services.auth import verify_firebase_token
-from services.ai_pipeline import run_journal_ai
+from services.ai_pipeline import run_journal_ai_async, stream_journal_ai
+from services.enrichment import (
+    ENRICHMENT_MODE,
+    ENRICHMENT_FIELDS,
+    STATUS_COMPLETE,
+    claim_pending,
+    enqueue_enrichment,
+    enrichment_fields,
+    pending_fields
+)
+from services.rollups import record_journal
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_async
+from services.sessions import (
+    JOURNAL_SESSIONS,
+    ensure_session_index,
+    record_session_message,
+    session_out,
+    sessions_query
+)
+from services.metrics import track_call
 from models.schemas import JournalCreate
 
-router = APIRouter(prefix="/journals", tags=["journals"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/journals", tags=["journals"])
 
-@router.post("/")
-def create_journal(
-    journal: JournalCreate,
-    uid: str = Depends(verify_firebase_token)
-):
-    db = get_db()
-    created_at = datetime.utcnow()
-    ai_output = run_journal_ai(journal.content)
 
+def _base_journal(db, journal: JournalCreate, uid: str):
     doc_ref = db.collection("journals").document()
     session_id = journal.session_id or doc_ref.id
 
@@ -30,101 +50,245 @@ def create_journal(
         "session_id": session_id,
         "title": title,
         "content": journal.content,
-        "created_at": created_at,
-        "sentiment": ai_output["sentiment"],
-        "sentiment_scores": ai_output["sentiment_scores"],
-        "key_phrases": ai_output["key_phrases"],
-        "risk_score": ai_output["risk_score"],
-        "flagged": ai_output["flagged"],
-        "reflection": ai_output["reflection"],
-        "themes": ai_output["themes"],
-        "follow_up_question": ai_output.get("follow_up_question")
+        "created_at": datetime.utcnow(),
     }
+    return doc_ref, journal_data
+
 
-    doc_ref.set(journal_data)
+async def _after_write(fn, *args):
+    """
+    Index and rollup updates are transactional on the sync client. Both
+    can be rebuilt, so a saturated Firestore pool only logs.
+    """
+    try:
+        await firestore_bulkhead.run(fn, *args)
+    except BulkheadFull as e:
+        logger.warning("Skipped post-write update", extra={"update": fn.__name__, "error": str(e)})
+
+
+# Keeps fire-and-forget post-write updates referenced until they finish
+_after_write_tasks = set()
+
+
+def _after_write_later(fn, *args):
+    """
+    _after_write without making the response wait for it.
+    """
+    task = asyncio.create_task(_after_write(fn, *args))
+    _after_write_tasks.add(task)
+    task.add_done_callback(_after_write_tasks.discard)
+
+
+@router.post("/")
+async def create_journal(
+    journal: JournalCreate,
+    uid: str = Depends(verify_firebase_token)
+):
+    db = get_async_db()
+    background = ENRICHMENT_MODE == "background"
+
+    doc_ref, journal_data = _base_journal(db, journal, uid)
+    session_id = journal_data["session_id"]
+
+    if background:
+        # Store immediately, AI fields are filled in by the worker pool
+        journal_data.update(pending_fields())
+    else:
+        ai_output = await run_journal_ai_async(journal.content)
+        journal_data.update(enrichment_fields(ai_output))
+        journal_data["enrichment_status"] = STATUS_COMPLETE
+
+    with track_call("firestore", "journal_set"):
+        await doc_ref.set(journal_data)
+    # The session index is the only extra work in background mode; keep
+    # it off the response so POST /journals stays a single write
+    _after_write_later(
+        record_session_message, uid, session_id, journal_data["title"], journal_data["created_at"]
+    )
+
+    if background:
+        enqueue_enrichment(doc_ref.id, journal_data)
+    else:
+        await _after_write(record_journal, uid, journal_data)
 
     return {"id": doc_ref.id, "session_id": session_id, **journal_data}
 
 
-@router.get("/sessions")
-def get_sessions(uid: str = Depends(verify_firebase_token)):
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.post("/stream")
+def create_journal_stream(
+    journal: JournalCreate,
+    uid: str = Depends(verify_firebase_token)
+):
+    """
+    Create a journal entry, streaming the reflection over Server-Sent Events.
+    Emits "token" events as reflection text arrives and a final "done"
+    event carrying the stored entry.
+    """
     db = get_db()
+    doc_ref, journal_data = _base_journal(db, journal, uid)
 
-    docs = (
-        db.collection("journals")
-        .where("uid", "==", uid)
-        .stream()
+    # Stored before streaming, so a client that disconnects mid-stream
+    # still keeps its entry; the pending sweep enriches it later
+    journal_data.update(pending_fields())
+    with track_call("firestore", "journal_set"):
+        doc_ref.set(journal_data)
+    record_session_message(uid, journal_data["session_id"], journal_data["title"], journal_data["created_at"])
+
+    def events():
+        ai_output = None
+        for kind, value in stream_journal_ai(journal.content):
+            if kind == "token":
+                yield _sse("token", {"text": value})
+            else:
+                ai_output = value
+
+        fields = {
+            **enrichment_fields(ai_output),
+            "enrichment_status": STATUS_COMPLETE
+        }
+        journal_data.update(fields)
+
+        # Claimed like a background job, so the pending sweep never
+        # enriches (and counts) the same entry a second time
+        try:
+            claimed = claim_pending(doc_ref)
+        except Exception as e:
+            logger.warning("Stream enrichment claim failed", extra={"journal_id": doc_ref.id, "error": str(e)})
+            claimed = False
+
+        if claimed:
+            with track_call("firestore", "journal_enrich"):
+                doc_ref.update(fields)
+            record_journal(uid, journal_data)
+
+        yield _sse("done", {"id": doc_ref.id, **journal_data})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-    seen: dict = {}
-    for doc in docs:
-        data = doc.to_dict()
-
-        # Legacy docs with no session_id: use doc.id as session key
-        sid = data.get("session_id") or doc.id
-        created_at = data.get("created_at")
-
-        if sid not in seen:
-            # ✅ Treat "Journal reflection" as empty — fall back to content
-            stored_title = data.get("title", "")
-            if not stored_title or stored_title.strip().lower() in ("journal reflection", ""):
-                stored_title = data.get("content", "")
-            seen[sid] = {
-                "session_id": sid,
-                "title": stored_title[:40],
-                "created_at": created_at,
-            }
-        else:
-            # Keep earliest created_at as session anchor
-            existing = seen[sid]["created_at"]
-            if existing and created_at and created_at < existing:
-                seen[sid]["created_at"] = created_at
-
-    sessions = list(seen.values())
-    sessions.sort(key=lambda s: s["created_at"] or datetime.min, reverse=True)
-    return sessions
+
+@router.get("/sessions")
+async def get_sessions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    uid: str = Depends(verify_firebase_token)
+):
+    db = get_async_db()
+
+    if not cursor:
+        # Users with journals from before the index existed: backfill once
+        await ensure_session_index(uid, db)
+
+    # One ordered query over the session index, not every journal
+    try:
+        docs, next_cursor = await paginate_async(
+            sessions_query(uid, db), db.collection(JOURNAL_SESSIONS), limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "sessions": [session_out(doc.to_dict()) for doc in docs],
+        "next_cursor": next_cursor
+    }
 
 
 @router.get("/session/{session_id}")
-def get_session_messages(
+async def get_session_messages(
     session_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     uid: str = Depends(verify_firebase_token)
 ):
-    db = get_db()
+    db = get_async_db()
 
-    # Modern: query by session_id field
-    docs = (
+    # Modern: query by session_id field, oldest first
+    query = (
         db.collection("journals")
         .where("uid", "==", uid)
         .where("session_id", "==", session_id)
-        .stream()
+        .order_by("created_at")
     )
 
+    try:
+        docs, next_cursor = await paginate_async(query, db.collection("journals"), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     results = [{"id": doc.id, **doc.to_dict()} for doc in docs]
 
     # ✅ Legacy fallback: old docs had no session_id stored,
     # get_sessions used doc.id as the key — fetch that single doc directly
-    if not results:
-        doc = db.collection("journals").document(session_id).get()
+    if not results and not cursor:
+        with track_call("firestore", "journal_get"):
+            doc = await db.collection("journals").document(session_id).get()
         if doc.exists:
             data = doc.to_dict()
             if data.get("uid") == uid:
                 results = [{"id": doc.id, **data}]
 
-    results.sort(key=lambda x: x.get("created_at") or datetime.min)
-    return results
+    return {"messages": results, "next_cursor": next_cursor}
 
 
 @router.get("/")
-def get_journals(uid: str = Depends(verify_firebase_token)):
-    db = get_db()
+async def get_journals(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    uid: str = Depends(verify_firebase_token)
+):
+    db = get_async_db()
 
-    docs = (
+    # Newest first, so the first page is the recent entries
+    query = (
         db.collection("journals")
         .where("uid", "==", uid)
-        .stream()
+        .order_by("created_at", direction="DESCENDING")
     )
 
-    results = [{"id": doc.id, **doc.to_dict()} for doc in docs]
-    results.sort(key=lambda x: x.get("created_at") or datetime.min)
-    return results
\ No newline at end of file
+    try:
+        docs, next_cursor = await paginate_async(query, db.collection("journals"), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "journals": [{"id": doc.id, **doc.to_dict()} for doc in docs],
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/{journal_id}/status")
+async def get_enrichment_status(
+    journal_id: str,
+    uid: str = Depends(verify_firebase_token)
+):
+    """
+    Poll the AI enrichment state of a journal entry.
+    """
+    db = get_async_db()
+
+    with track_call("firestore", "journal_get"):
+        doc = await db.collection("journals").document(journal_id).get()
+    if not doc.exists:
+        raise HTTPException(status_code=404, detail="Journal not found")
+
+    data = doc.to_dict()
+    if data.get("uid") != uid:
+        raise HTTPException(status_code=404, detail="Journal not found")
+
+    # Entries written before background enrichment were always enriched inline
+    status = data.get("enrichment_status", STATUS_COMPLETE)
+
+    result = {"id": doc.id, "enrichment_status": status}
+    if status == STATUS_COMPLETE:
+        result.update({
+            field: data.get(field)
+            for field in ENRICHMENT_FIELDS
+        })
+    return result
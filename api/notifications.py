@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime
-from services.firebase import get_db
+from typing import Optional
+from services.firebase import get_db, get_async_db
 from services.auth import verify_firebase_token
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_async
 
 router = APIRouter(
     prefix="/notifications",
@@ -10,38 +12,47 @@ router = APIRouter(
 
 
 @router.get("/")
-def get_notifications(uid: str = Depends(verify_firebase_token)):
-    db = get_db()
+async def get_notifications(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    uid: str = Depends(verify_firebase_token)
+):
+    db = get_async_db()
 
-    docs = (
+    query = (
         db.collection("notifications")
         .where("uid", "==", uid)
         .order_by("created_at", direction="DESCENDING")
-        .stream()
     )
 
+    try:
+        docs, next_cursor = await paginate_async(query, db.collection("notifications"), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return {
         "notifications": [
             {"id": doc.id, **doc.to_dict()}
             for doc in docs
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
 
 @router.post("/acknowledge")
-def acknowledge_notification(
+async def acknowledge_notification(
     notification_id: str,
     uid: str = Depends(verify_firebase_token)
 ):
-    db = get_db()
+    db = get_async_db()
 
     doc_ref = db.collection("notifications").document(notification_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
 
     if not doc.exists or doc.to_dict().get("uid") != uid:
         return {"message": "Notification not found"}
 
-    doc_ref.update({"acknowledged": True})
+    await doc_ref.update({"acknowledged": True})
 
     return {"message": "Notification acknowledged"}
 
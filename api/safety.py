@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from services.firebase import get_db
+from services.safety_plans import get_safety_plan as load_safety_plan, save_safety_plan
 from services.auth import verify_firebase_token
 from models.schemas import SafetyPlanCreate, SafetyPlanOut
 
@@ -9,20 +9,17 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=SafetyPlanOut)
-def create_or_update_safety_plan(
+async def create_or_update_safety_plan(
     plan: SafetyPlanCreate,
     uid: str = Depends(verify_firebase_token)
 ):
-    db = get_db()
-
-    doc_ref = db.collection("safety_plans").document(uid)
-
     safety_plan_data = {
         "uid": uid,
         **plan.dict()
     }
 
-    doc_ref.set(safety_plan_data)
+    # Write-through: crisis support reads the cached copy
+    await save_safety_plan(uid, safety_plan_data)
 
     return {
         "id": uid,
@@ -31,15 +28,13 @@ def create_or_update_safety_plan(
 
 
 @router.get("/", response_model=SafetyPlanOut)
-def get_safety_plan(
+async def get_safety_plan(
     uid: str = Depends(verify_firebase_token)
 ):
-    db = get_db()
+    # The editor always reads the stored plan, never a cached copy
+    safety_plan = await load_safety_plan(uid, cached=False)
 
-    doc_ref = db.collection("safety_plans").document(uid)
-    doc = doc_ref.get()
-
-    if not doc.exists:
+    if safety_plan is None:
         return {
             "id": uid,
             "uid": uid,
@@ -50,6 +45,6 @@ def get_safety_plan(
         }
 
     return {
-        "id": doc.id,
-        **doc.to_dict()
+        "id": uid,
+        **safety_plan
     }
\ No newline at end of file
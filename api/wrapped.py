@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from datetime import datetime, timedelta
-from collections import Counter, defaultdict
-from statistics import mean
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, date
+from typing import Optional
 
 from services.firebase import get_db
 from services.auth import verify_firebase_token
-from services.gemini import generate_reflection  # AI summary
+from services.rollups import DASHBOARD_ROLLUPS, rebuild_rollups
+from services.wrapped import (
+    MAX_WRAPPED_DAYS,
+    MIN_WRAPPED_JOURNALS,
+    load_buckets,
+    resolve_period,
+    wrapped_stats,
+    wrapped_summary
+)
 
 router = APIRouter(
     prefix="/wrapped",
@@ -14,144 +21,58 @@ router = APIRouter(
 
 
 @router.get("/")
-def get_wrapped(uid: str = Depends(verify_firebase_token)):
+def get_wrapped(
+    days: int = Query(30, ge=1, le=MAX_WRAPPED_DAYS),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    uid: str = Depends(verify_firebase_token)
+):
     db = get_db()
 
-    now = datetime.utcnow()
-    start_date = now - timedelta(days=30)
+    try:
+        start_date, end_date, period, period_key = resolve_period(
+            datetime.utcnow().date(), days, start, end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # -----------------------------
-    # Fetch last 30 days journals
+    # Merge precomputed daily buckets
     # -----------------------------
-    docs = (
-        db.collection("journals")
-        .where("uid", "==", uid)
-        .where("created_at", ">=", start_date)
-        .stream()
-    )
+    buckets = load_buckets(uid, start_date, end_date)
+    stats = wrapped_stats(buckets)
 
-    journals = [doc.to_dict() for doc in docs]
+    if stats["total_journals"] < MIN_WRAPPED_JOURNALS:
+        # Users from before daily buckets existed: backfill once, then retry
+        if not db.collection(DASHBOARD_ROLLUPS).document(uid).get().exists:
+            rebuild_rollups(uid)
+            buckets = load_buckets(uid, start_date, end_date)
+            stats = wrapped_stats(buckets)
 
-    if len(journals) < 3:
+    if stats["total_journals"] < MIN_WRAPPED_JOURNALS:
         return {
             "message": "Not enough check-ins yet for your Anchor Wrapped.",
-            "required": 3,
-            "current": len(journals)
+            "required": MIN_WRAPPED_JOURNALS,
+            "current": stats["total_journals"]
         }
 
-    # -----------------------------
-    # Basic stats
-    # -----------------------------
-    total_journals = len(journals)
-    active_days = len(
-        set(j["created_at"].date() for j in journals if j.get("created_at"))
-    )
-
-    # -----------------------------
-    # Mood scoring
-    # -----------------------------
-    daily_scores = defaultdict(list)
-
-    for j in journals:
-        scores = j.get("sentiment_scores", {})
-        pos = scores.get("positive", 0.0)
-        neg = scores.get("negative", 0.0)
-
-        raw_score = pos - neg                 # -1 → +1
-        normalized = int((raw_score + 1) * 50)  # 0 → 100
-
-        date_key = j["created_at"].date().isoformat()
-        daily_scores[date_key].append(normalized)
-
-    mood_trend = [
-        {
-            "date": day,
-            "score": int(mean(scores))
-        }
-        for day, scores in sorted(daily_scores.items())
-    ]
-
-    average_mood_score = int(
-        mean(item["score"] for item in mood_trend)
-    )
-
-    if average_mood_score <= 30:
-        mood_label = "Struggling"
-    elif average_mood_score <= 50:
-        mood_label = "Heavy"
-    elif average_mood_score <= 70:
-        mood_label = "Steady"
-    elif average_mood_score <= 85:
-        mood_label = "Positive"
-    else:
-        mood_label = "Thriving"
+    total_journals = stats["total_journals"]
+    active_days = stats["active_days"]
+    average_mood_score = stats["average_mood_score"]
+    mood_label = stats["mood_label"]
+    top_themes = stats["top_themes"]
+    high_risk_entries = stats["high_risk_entries"]
 
     # -----------------------------
-    # Emotional themes
+    # AI Summary (cached, regenerated only when stats change)
     # -----------------------------
-    themes = []
-    for j in journals:
-        themes.extend(j.get("themes", []))
-
-    top_themes = [
-        theme for theme, _ in Counter(themes).most_common(3)
-    ]
-
-    # -----------------------------
-    # Safety snapshot
-    # -----------------------------
-    risk_scores = [j.get("risk_score", 0.0) for j in journals]
-    high_risk_entries = len([r for r in risk_scores if r >= 0.5])
-    max_risk_score = round(max(risk_scores), 2)
-
-    # -----------------------------
-    # Highlights
-    # -----------------------------
-    day_counts = Counter(
-        j["created_at"].strftime("%A") for j in journals
-    )
-    most_active_day = day_counts.most_common(1)[0][0]
-
-    # longest streak
-    dates = sorted(
-        set(j["created_at"].date() for j in journals)
-    )
-
-    longest_streak = current = 1
-    for i in range(1, len(dates)):
-        if (dates[i] - dates[i - 1]).days == 1:
-            current += 1
-            longest_streak = max(longest_streak, current)
-        else:
-            current = 1
-
-    # -----------------------------
-    # AI Summary (Gemini)
-    # -----------------------------
-    summary_prompt = f"""
-Create a warm, encouraging monthly reflection.
-
-Context:
-- Journals written: {total_journals}
-- Active days: {active_days}
-- Average mood score: {average_mood_score} ({mood_label})
-- Top emotional themes: {', '.join(top_themes)}
-- High intensity moments: {high_risk_entries}
-
-Rules:
-- No diagnosis
-- No clinical language
-- Gentle, human tone
-- 3–4 sentences max
-"""
-
-    ai_summary = generate_reflection(summary_prompt)
+    ai_summary = wrapped_summary(uid, period_key, period, stats)
 
     # -----------------------------
     # Final response
     # -----------------------------
     return {
-        "period": "Last 30 Days",
+        "period": period,
 
         "stats": {
             "total_journals": total_journals,
@@ -161,7 +82,7 @@ Rules:
         "mood": {
             "average_score": average_mood_score,
             "label": mood_label,
-            "trend": mood_trend
+            "trend": stats["mood_trend"]
         },
 
         "emotions": {
@@ -170,18 +91,15 @@ Rules:
 
         "safety": {
             "high_risk_entries": high_risk_entries,
-            "max_risk_score": max_risk_score
+            "max_risk_score": stats["max_risk_score"]
         },
 
         "highlights": {
-            "most_active_day": most_active_day,
-            "longest_streak": longest_streak
+            "most_active_day": stats["most_active_day"],
+            "longest_streak": stats["longest_streak"]
         },
 
-        "ai_summary": {
-            "title": ai_summary.get("themes", ["Your month"])[0],
-            "narrative": ai_summary.get("reflection")
-        }
+        "ai_summary": ai_summary
     }
 
 @router.get("/demo")
@@ -1,17 +1,50 @@
-from fastapi.middleware.cors import CORSMiddleware
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 load_dotenv()
 
+from services.logs import configure_logging
+configure_logging()
 
-from fastapi import FastAPI
+from services.startup import timed, startup_report, log_startup_report
 
-# --- Auth-firebase routers ---
-from api import journal, safety, crisis, notifications, wrapped
-from api.auth import router as auth_router  # newly created auth endpoints
+with timed("import fastapi"):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, Response
+    from fastapi.middleware.cors import CORSMiddleware
 
-# --- api_core routers (unique ones) ---
-from api.dashboard import router as dashboard_router
-from api.community import router as community_router
+# --- Routers, timed one by one (shared services count toward the first importer) ---
+ROUTER_MODULES = (
+    "api.auth",
+    "api.journal",
+    "api.safety",
+    "api.crisis",
+    "api.notifications",
+    "api.wrapped",
+    # api_core unique routes
+    "api.dashboard",
+    "api.community",
+)
+
+routers = []
+for module_name in ROUTER_MODULES:
+    with timed(f"import {module_name}"):
+        routers.append(importlib.import_module(module_name).router)
+
+from services.firebase import get_db
+from services.azure_language import warm_language_client
+from services.azure_safety import cache_stats as content_safety_cache_stats, get_safety_client
+from services.gemini import get_gemini_client, model_health, token_usage
+from services.counters import flush as flush_counters
+from services.auth import start_key_refresher
+from services.enrichment import start_pending_sweeper
+from services.bulkheads import BulkheadFull, bulkhead_stats
+from services.metrics import REQUEST_LATENCY, metrics_payload
+
+logger = logging.getLogger("main")
 
 
 app = FastAPI(title="Anchor Backend")
@@ -22,26 +55,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Include routers ---
-# Firebase auth + main routes
-app.include_router(auth_router)
-app.include_router(journal.router)
-app.include_router(safety.router)
-app.include_router(crisis.router)
-app.include_router(notifications.router)
-app.include_router(wrapped.router)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates, not raw paths, keep label cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status)
+        ).observe(time.perf_counter() - started)
+
+
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full(request: Request, exc: BulkheadFull):
+    # Fail fast rather than queue behind a saturated dependency
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+
+# Built concurrently after startup; each is also built on first use,
+# so requests never wait for the warm-up to finish
+WARMUP_STEPS = {
+    "firestore": get_db,
+    "azure_language": warm_language_client,
+    "content_safety": get_safety_client,
+    "gemini": get_gemini_client,
+}
 
 
-# api_core unique routes
-app.include_router(dashboard_router)
-app.include_router(community_router)
+def _warm_up():
+    with timed("warm-up total"):
+        with ThreadPoolExecutor(max_workers=len(WARMUP_STEPS), thread_name_prefix="warm-up") as pool:
+            futures = {name: pool.submit(step) for name, step in WARMUP_STEPS.items()}
+        for name, future in futures.items():
+            if future.exception():
+                logger.warning(
+                    "Warm-up step failed",
+                    extra={"step": name, "error": str(future.exception())}
+                )
+
+    start_key_refresher()
+    start_pending_sweeper()
+    log_startup_report()
+
+
+@app.on_event("startup")
+def warm_clients():
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def flush_buffered_counters():
+    flush_counters()
+
+# --- Include routers ---
+for router in routers:
+    app.include_router(router)
 
 # --- Root & health endpoints ---
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Anchor backend is running"}
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/startup")
+async def startup_health():
+    return {"timings": startup_report()}
+
+@app.get("/health/ai")
+async def ai_health():
+    return {
+        "gemini_models": model_health(),
+        "gemini_tokens": token_usage(),
+        "content_safety_cache": content_safety_cache_stats(),
+        "bulkheads": bulkhead_stats()
+    }
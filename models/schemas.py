@@ -30,6 +30,9 @@ class JournalOut(BaseModel):
     reflection: Optional[str]
     themes: Optional[List[str]]
     follow_up_question: Optional[str]  
+
+    # pending / complete / failed
+    enrichment_status: Optional[str] = None
     
 # --------------------
 # Safety Plan Schemas
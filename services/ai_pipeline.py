@@ -1,6 +1,107 @@
-from services.azure_language import analyze_text
-from services.azure_safety import analyze_content
-from services.gemini import generate_reflection
+import os
+import time
+import asyncio
+import logging
+from copy import deepcopy
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from services.azure_language import analyze_text, analyze_text_async, LANGUAGE_FALLBACK
+from services.azure_safety import analyze_content, analyze_content_async, SAFETY_FALLBACK
+from services.bulkheads import BulkheadFull, bulkhead
+from services.metrics import AI_STAGE_LATENCY, FALLBACKS
+from services.gemini import (
+    generate_reflection,
+    generate_reflection_async,
+    stream_reflection,
+    REFLECTION_FALLBACK
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-stage budgets (seconds), measured from the moment the stages fan out
+LANGUAGE_TIMEOUT = float(os.getenv("AI_LANGUAGE_TIMEOUT", "4"))
+SAFETY_TIMEOUT = float(os.getenv("AI_SAFETY_TIMEOUT", "4"))
+REFLECTION_TIMEOUT = float(os.getenv("AI_REFLECTION_TIMEOUT", "12"))
+
+# Shared pool: three stages per journal, so this bounds concurrent journals
+_bulkhead = bulkhead(
+    "ai_pipeline",
+    max_workers=int(os.getenv("AI_PIPELINE_WORKERS", "24")),
+    max_queue=48
+)
+
+
+def _stage_label(name: str) -> str:
+    return name.lower().replace(" ", "_")
+
+
+def _fallback(name: str, reason: str, fallback: dict, error=None) -> dict:
+    FALLBACKS.labels(_stage_label(name), reason).inc()
+    logger.warning(
+        "AI stage fallback",
+        extra={"stage": name, "reason": reason, "error": str(error) if error else None}
+    )
+    return deepcopy(fallback)
+
+
+def _submit(name: str, fn, content: str) -> Future:
+    """
+    Start a stage; when the pipeline is saturated the stage fails at
+    once and _stage_result substitutes its fallback.
+    """
+    started = time.monotonic()
+    try:
+        future = _bulkhead.submit(fn, content)
+    except BulkheadFull as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+    def observe(done: Future):
+        if done.cancelled():
+            outcome = "error"
+        elif isinstance(done.exception(), BulkheadFull):
+            outcome = "saturated"
+        else:
+            outcome = "error" if done.exception() else "ok"
+        AI_STAGE_LATENCY.labels(_stage_label(name), outcome).observe(time.monotonic() - started)
+
+    future.add_done_callback(observe)
+    return future
+
+
+def _stage_result(name: str, future, deadline: float, fallback: dict) -> dict:
+    """
+    Wait for a stage until its deadline, returning its fallback on
+    timeout or error. A timed-out call is left to finish in the background.
+    """
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeout:
+        future.cancel()
+        return _fallback(name, "timeout", fallback)
+    except BulkheadFull as e:
+        return _fallback(name, "saturated", fallback, e)
+    except Exception as e:
+        return _fallback(name, "error", fallback, e)
+
+
+def _combine_results(language_result: dict, safety_result: dict, reflection_result: dict) -> dict:
+    return {
+        # Azure Language
+        "sentiment": language_result.get("sentiment", "neutral"),
+        "sentiment_scores": language_result.get("sentiment_scores", {}),
+        "key_phrases": language_result.get("key_phrases", []),
+
+        # Azure Content Safety
+        "risk_score": safety_result.get("risk_score", 0.0),
+        "flagged": safety_result.get("flagged", False),
+
+        # Gemini GenAI
+        "reflection": reflection_result.get("reflection"),
+        "themes": reflection_result.get("themes", []),
+        "follow_up_question": reflection_result.get("follow_up_question")
+    }
 
 
 def run_journal_ai(content: str) -> dict:
@@ -10,37 +111,120 @@ def run_journal_ai(content: str) -> dict:
     - Azure AI Language (sentiment + key phrases)
     - Azure Content Safety (risk scoring)
     - Gemini (reflection + themes with model failover)
+
+    The three stages run concurrently, so latency is the slowest
+    stage rather than the sum of all three.
     """
 
-    print("run_journal_ai() called")
+    logger.debug("run_journal_ai called")
+
+    started = time.monotonic()
+
+    language_future = _submit("Azure Language", analyze_text, content)
+    safety_future = _submit("Content Safety", analyze_content, content)
+    reflection_future = _submit("Gemini", generate_reflection, content)
 
     # -------------------------
     # Azure AI Language
     # -------------------------
-    language_result = analyze_text(content)
+    language_result = _stage_result(
+        "Azure Language", language_future,
+        started + LANGUAGE_TIMEOUT, LANGUAGE_FALLBACK
+    )
 
     # -------------------------
     # Azure Content Safety
     # -------------------------
-    safety_result = analyze_content(content)
+    safety_result = _stage_result(
+        "Content Safety", safety_future,
+        started + SAFETY_TIMEOUT, SAFETY_FALLBACK
+    )
 
     # -------------------------
     # Gemini (reflection + themes)
     # -------------------------
-    reflection_result = generate_reflection(content)
+    reflection_result = _stage_result(
+        "Gemini", reflection_future,
+        started + REFLECTION_TIMEOUT, REFLECTION_FALLBACK
+    )
 
-    return {
-        # Azure Language
-        "sentiment": language_result.get("sentiment", "neutral"),
-        "sentiment_scores": language_result.get("sentiment_scores", {}),
-        "key_phrases": language_result.get("key_phrases", []),
+    return _combine_results(language_result, safety_result, reflection_result)
 
-        # Azure Content Safety
-        "risk_score": safety_result.get("risk_score", 0.0),
-        "flagged": safety_result.get("flagged", False),
 
-        # Gemini GenAI
-        "reflection": reflection_result.get("reflection"),
-        "themes": reflection_result.get("themes", []),
-        "follow_up_question": reflection_result.get("follow_up_question")
-    }
+async def _stage_result_async(name: str, stage, timeout: float, fallback: dict) -> dict:
+    started = time.monotonic()
+    outcome = "error"
+    try:
+        result = await asyncio.wait_for(stage, timeout=timeout)
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        return _fallback(name, "timeout", fallback)
+    except BulkheadFull as e:
+        outcome = "saturated"
+        return _fallback(name, "saturated", fallback, e)
+    except Exception as e:
+        return _fallback(name, "error", fallback, e)
+    finally:
+        AI_STAGE_LATENCY.labels(_stage_label(name), outcome).observe(time.monotonic() - started)
+
+
+async def run_journal_ai_async(content: str) -> dict:
+    """
+    run_journal_ai for async routes: the same stages and budgets,
+    awaited on the event loop instead of blocking a worker thread.
+    """
+
+    logger.debug("run_journal_ai_async called")
+
+    language_result, safety_result, reflection_result = await asyncio.gather(
+        _stage_result_async(
+            "Azure Language", analyze_text_async(content),
+            LANGUAGE_TIMEOUT, LANGUAGE_FALLBACK
+        ),
+        _stage_result_async(
+            "Content Safety", analyze_content_async(content),
+            SAFETY_TIMEOUT, SAFETY_FALLBACK
+        ),
+        _stage_result_async(
+            "Gemini", generate_reflection_async(content),
+            REFLECTION_TIMEOUT, REFLECTION_FALLBACK
+        )
+    )
+
+    return _combine_results(language_result, safety_result, reflection_result)
+
+
+def stream_journal_ai(content: str):
+    """
+    Streaming variant of run_journal_ai.
+    Yields ("token", str) reflection chunks as Gemini produces them, then one
+    ("result", dict) shaped like run_journal_ai's return value. Azure stages
+    run in the background while the reflection streams.
+    """
+
+    logger.debug("stream_journal_ai called")
+
+    started = time.monotonic()
+
+    language_future = _submit("Azure Language", analyze_text, content)
+    safety_future = _submit("Content Safety", analyze_content, content)
+
+    reflection_result = deepcopy(REFLECTION_FALLBACK)
+    for kind, value in stream_reflection(content):
+        if kind == "token":
+            yield "token", value
+        else:
+            reflection_result = value
+
+    language_result = _stage_result(
+        "Azure Language", language_future,
+        started + LANGUAGE_TIMEOUT, LANGUAGE_FALLBACK
+    )
+    safety_result = _stage_result(
+        "Content Safety", safety_future,
+        started + SAFETY_TIMEOUT, SAFETY_FALLBACK
+    )
+
+    yield "result", _combine_results(language_result, safety_result, reflection_result)
@@ -1,18 +1,127 @@
 import os
+import time
+import hashlib
+import logging
+import threading
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer
-from services.firebase import firebase_auth
+from services.firebase import get_auth
+from services.cache import TTLCache
+from services.bulkheads import BulkheadFull, bulkhead
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
+# Decoded claims of verified ID tokens, kept until the token's exp
+TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
+# Refresh Google's signing keys well before their HTTP cache expires
+KEY_REFRESH_SECONDS = float(os.getenv("FIREBASE_KEY_REFRESH_SECONDS", "3600"))
+
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=3600, name="firebase_tokens")
+_key_refresher = None
+_key_refresher_lock = threading.Lock()
+
+# First verifications of a token (and their key fetches) get their own
+# threads, so a slow Google endpoint cannot starve the request threadpool
+_bulkhead = bulkhead("firebase_auth", max_workers=8, max_queue=64)
+
 
 DEV_MODE = os.getenv("DEV_MODE") == "true"
-print("DEV_MODE=",DEV_MODE)
+if DEV_MODE:
+    logger.warning("DEV_MODE is on: authentication is bypassed")
+
+
+# -------------------------------------------------
+# Signing keys
+# -------------------------------------------------
+def _refresh_signing_keys():
+    """
+    Re-fetch the ID token certificates through the verifier's own
+    cache-control session, so verification always finds them cached.
+    Relies on firebase_admin internals; skipped if they move.
+    """
+    try:
+        from firebase_admin import _token_gen
+        verifier = get_auth()._get_client(None)._token_verifier
+        with track_call("google_certs", "refresh"):
+            response = verifier.request(
+                _token_gen.ID_TOKEN_CERT_URI,
+                method="GET",
+                headers={"Cache-Control": "no-cache"}
+            )
+        if response.status != 200:
+            logger.warning("Signing key refresh failed", extra={"status": response.status})
+    except Exception as e:
+        logger.warning("Signing key refresh failed", extra={"error": str(e)})
+
+
+def _key_refresh_loop():
+    while True:
+        _refresh_signing_keys()
+        time.sleep(KEY_REFRESH_SECONDS)
+
+
+def start_key_refresher():
+    global _key_refresher
+    if DEV_MODE or _key_refresher is not None:
+        return
+    with _key_refresher_lock:
+        if _key_refresher is None:
+            _key_refresher = threading.Thread(
+                target=_key_refresh_loop,
+                name="firebase-key-refresh",
+                daemon=True
+            )
+            _key_refresher.start()
+
 
-def verify_firebase_token(token=Depends(security)):
+# -------------------------------------------------
+# Token verification
+# -------------------------------------------------
+def _token_key(id_token: str) -> str:
+    return hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+
+def cached_claims(id_token: str):
+    """
+    Claims from an earlier verification of this token, if still valid.
+    """
+    key = _token_key(id_token)
+    claims = _token_cache.get(key)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            return dict(claims)
+        _token_cache.pop(key)
+    return None
+
+
+def verify_id_token(id_token: str) -> dict:
+    """
+    Decoded claims for an ID token, cached by token hash until it
+    expires. Raises like firebase_admin's verify_id_token; failures are
+    never cached.
+    """
+    claims = cached_claims(id_token)
+    if claims is not None:
+        return claims
+
+    key = _token_key(id_token)
+
+    start_key_refresher()
+    with track_call("firebase_auth", "verify_id_token"):
+        claims = get_auth().verify_id_token(id_token)
+    _token_cache.set(key, claims, ttl=claims["exp"] - time.time())
+    return dict(claims)
+
+
+async def verify_firebase_token(token=Depends(security)):
     """
     Verify Firebase ID token.
     In DEV_MODE, bypass auth and return a dummy uid.
+    Cached tokens are answered on the event loop; only a first
+    verification goes to the firebase_auth bulkhead.
     """
 
     if DEV_MODE:
@@ -22,8 +131,14 @@ def verify_firebase_token(token=Depends(security)):
     if token is None:
         raise HTTPException(status_code=401, detail="Authorization header missing")
 
+    decoded_token = cached_claims(token.credentials)
+    if decoded_token is not None:
+        return decoded_token.get("uid")
+
     try:
-        decoded_token = firebase_auth.verify_id_token(token.credentials)
+        decoded_token = await _bulkhead.run(verify_id_token, token.credentials)
         return decoded_token.get("uid")
+    except BulkheadFull:
+        raise
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
\ No newline at end of file
@@ -1,71 +1,291 @@
 import os
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
+import time
+import queue
+import asyncio
+import logging
+import threading
+from copy import deepcopy
+from concurrent.futures import Future, ThreadPoolExecutor
+from services.bulkheads import BulkheadFull, bulkhead
+from services.startup import timed
+from services.metrics import FALLBACKS, track_call
+
+logger = logging.getLogger(__name__)
 
 AZURE_LANGUAGE_KEY = os.getenv("AZURE_LANGUAGE_KEY")
 AZURE_LANGUAGE_ENDPOINT = os.getenv("AZURE_LANGUAGE_ENDPOINT")
+AZURE_LANGUAGE_POOL_SIZE = int(os.getenv("AZURE_LANGUAGE_POOL_SIZE", "20"))
+
+# Micro-batching: Azure accepts up to 10 documents per sentiment/key phrase call
+AZURE_LANGUAGE_BATCH_SIZE = min(int(os.getenv("AZURE_LANGUAGE_BATCH_SIZE", "10")), 10)
+AZURE_LANGUAGE_BATCH_WINDOW_MS = float(os.getenv("AZURE_LANGUAGE_BATCH_WINDOW_MS", "10"))
+
+LANGUAGE_FALLBACK = {
+    "sentiment": "neutral",
+    "sentiment_scores": {
+        "positive": 0.33,
+        "neutral": 0.34,
+        "negative": 0.33
+    },
+    "key_phrases": []
+}
+
+
+# Runs the sentiment and key phrase calls side by side
+_executor = ThreadPoolExecutor(
+    max_workers=AZURE_LANGUAGE_POOL_SIZE,
+    thread_name_prefix="azure-language"
+)
+
+# Runs whole batches; kept separate from _executor so a batch waiting on
+# its two actions can never starve them of threads
+_bulkhead = bulkhead(
+    "azure_language",
+    max_workers=max(AZURE_LANGUAGE_POOL_SIZE // 2, 1),
+    max_queue=AZURE_LANGUAGE_POOL_SIZE
+)
+
+_client = None
+_session = None
+_client_lock = threading.Lock()
 
 
 def get_language_client():
     """
-    Create Azure AI Language client
+    Process-wide Azure AI Language client.
+    Built once over a pooled HTTP session so TLS connections are reused
+    across journals; Azure SDK clients are safe to share between threads.
     """
+    global _client, _session
+
+    if _client is not None:
+        return _client
+
     if not AZURE_LANGUAGE_KEY or not AZURE_LANGUAGE_ENDPOINT:
-        print("azure language env MISSING")
+        logger.warning("Azure Language env missing")
         return None
 
-    return TextAnalyticsClient(
-        endpoint=AZURE_LANGUAGE_ENDPOINT,
-        credential=AzureKeyCredential(AZURE_LANGUAGE_KEY)
-    )
+    with _client_lock:
+        if _client is None:
+            # SDK imports are deferred to here to keep cold starts cheap
+            with timed("import azure.ai.textanalytics"):
+                import requests
+                from requests.adapters import HTTPAdapter
+                from azure.ai.textanalytics import TextAnalyticsClient
+                from azure.core.credentials import AzureKeyCredential
+                from azure.core.pipeline.transport import RequestsTransport
 
+            _session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=AZURE_LANGUAGE_POOL_SIZE,
+                pool_maxsize=AZURE_LANGUAGE_POOL_SIZE
+            )
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
 
-def analyze_text(text: str) -> dict:
-    print("analyze_text called")
-
-    fallback = {
-        "sentiment": "neutral",
-        "sentiment_scores": {
-            "positive": 0.33,
-            "neutral": 0.34,
-            "negative": 0.33
-        },
-        "key_phrases": []
-    }
+            with timed("client azure_language"):
+                _client = TextAnalyticsClient(
+                    endpoint=AZURE_LANGUAGE_ENDPOINT,
+                    credential=AzureKeyCredential(AZURE_LANGUAGE_KEY),
+                    transport=RequestsTransport(session=_session, session_owner=False)
+                )
+
+    return _client
 
-    client = get_language_client()
-    if not client:
-        print("Azure Language client missing")
-        return fallback
+
+def warm_language_client():
+    """
+    Build the shared client and open a connection to the endpoint,
+    so the first journal doesn't pay for the TLS handshake.
+    """
+    if not get_language_client():
+        return
 
     try:
+        _session.head(AZURE_LANGUAGE_ENDPOINT, timeout=5)
+    except Exception as e:
+        logger.warning("Azure Language warm-up failed", extra={"error": str(e)})
+
+
+def _document_results(response) -> list:
+    """
+    Per-document results, with an exception in place of any document
+    the service rejected.
+    """
+    return [
+        RuntimeError(doc.error) if doc.is_error else doc
+        for doc in response
+    ]
+
+
+def _sentiment(client, texts: list) -> list:
+    with track_call("azure_language", "sentiment"):
         response = client.analyze_sentiment(
-            documents=[text],
+            documents=texts,
             show_opinion_mining=False
         )
 
-        result = response[0]
-        scores = result.confidence_scores  
+    results = []
+    for doc in _document_results(response):
+        if isinstance(doc, Exception):
+            results.append(doc)
+            continue
+
+        scores = doc.confidence_scores
 
         derived_sentiment = max(
             ["positive", "neutral", "negative"],
             key=lambda k: getattr(scores, k)
         )
 
-        key_phrase_result = client.extract_key_phrases(
-            documents=[text]
-        )[0]
-
-        return {
+        results.append({
             "sentiment": derived_sentiment,
             "sentiment_scores": {
                 "positive": scores.positive,
                 "neutral": scores.neutral,
                 "negative": scores.negative
-            },
-            "key_phrases": key_phrase_result.key_phrases
-        }
+            }
+        })
+    return results
 
-    except Exception as e:
-        print("Azure Language error:", e)
-        return fallback
\ No newline at end of file
+
+def _key_phrases(client, texts: list) -> list:
+    with track_call("azure_language", "key_phrases"):
+        response = client.extract_key_phrases(documents=texts)
+
+    return [
+        doc if isinstance(doc, Exception) else {"key_phrases": doc.key_phrases}
+        for doc in _document_results(response)
+    ]
+
+
+def _analyze_batch(texts: list) -> list:
+    """
+    Sentiment and key phrases for a batch of documents.
+    Both actions go out together; each falls back on its own, per document.
+    """
+    client = get_language_client()
+    results = [deepcopy(LANGUAGE_FALLBACK) for _ in texts]
+
+    sentiment_future = _executor.submit(_sentiment, client, texts)
+    key_phrase_future = _executor.submit(_key_phrases, client, texts)
+
+    for name, future in (("sentiment", sentiment_future), ("key_phrases", key_phrase_future)):
+        try:
+            action_results = future.result()
+        except Exception as e:
+            FALLBACKS.labels(f"azure_language_{name}", "error").inc(len(texts))
+            logger.warning("Azure Language action failed", extra={"action": name, "error": str(e)})
+            continue
+
+        for result, doc in zip(results, action_results):
+            if isinstance(doc, Exception):
+                FALLBACKS.labels(f"azure_language_{name}", "document_error").inc()
+                logger.warning("Azure Language document error", extra={"action": name, "error": str(doc)})
+            else:
+                result.update(doc)
+
+    return results
+
+
+class _MicroBatcher:
+    """
+    Collects concurrent analyze_text callers for a few milliseconds (or
+    until the batch is full) and sends them to Azure as one request.
+    Each caller gets a Future for its own document.
+    """
+
+    def __init__(self, handler, max_batch: int, window: float):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._collect,
+                    name="azure-language-batcher",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Dispatch off-thread so the next batch can start collecting
+            try:
+                _bulkhead.submit(self._dispatch, batch)
+            except BulkheadFull as e:
+                FALLBACKS.labels("azure_language", "saturated").inc(len(batch))
+                logger.warning("Azure Language batch rejected", extra={"error": str(e)})
+                self._resolve(batch, [deepcopy(LANGUAGE_FALLBACK) for _ in batch])
+
+    def _dispatch(self, batch: list):
+        texts = [text for text, _ in batch]
+        try:
+            results = self.handler(texts)
+        except Exception:
+            FALLBACKS.labels("azure_language", "error").inc(len(batch))
+            logger.exception("Azure Language batch error")
+            results = [deepcopy(LANGUAGE_FALLBACK) for _ in batch]
+
+        self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch: list, results: list):
+        for (_, future), result in zip(batch, results):
+            if future.set_running_or_notify_cancel():
+                future.set_result(result)
+
+
+_batcher = _MicroBatcher(
+    _analyze_batch,
+    max_batch=AZURE_LANGUAGE_BATCH_SIZE,
+    window=AZURE_LANGUAGE_BATCH_WINDOW_MS / 1000
+)
+
+
+def analyze_text(text: str) -> dict:
+    logger.debug("analyze_text called")
+
+    if not get_language_client():
+        logger.warning("Azure Language client missing")
+        FALLBACKS.labels("azure_language", "no_client").inc()
+        return deepcopy(LANGUAGE_FALLBACK)
+
+    return _batcher.submit(text).result()
+
+
+async def analyze_text_async(text: str) -> dict:
+    """
+    analyze_text for async callers: awaits the batch without holding a thread.
+    """
+    if not get_language_client():
+        logger.warning("Azure Language client missing")
+        FALLBACKS.labels("azure_language", "no_client").inc()
+        return deepcopy(LANGUAGE_FALLBACK)
+
+    return await asyncio.wrap_future(_batcher.submit(text))
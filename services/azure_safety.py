@@ -1,53 +1,157 @@
 import os
-from azure.ai.contentsafety import ContentSafetyClient
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.contentsafety.models import AnalyzeTextOptions
+import hashlib
+import logging
+import threading
+import unicodedata
+from copy import deepcopy
+from services.cache import TTLCache
+from services.bulkheads import BulkheadFull, bulkhead
+from services.startup import timed
+from services.metrics import FALLBACKS, track_call
+
+logger = logging.getLogger(__name__)
 
 AZURE_CONTENT_SAFETY_KEY = os.getenv("AZURE_CONTENT_SAFETY_KEY")
 AZURE_CONTENT_SAFETY_ENDPOINT = os.getenv("AZURE_CONTENT_SAFETY_ENDPOINT")
 
-client = None
-if AZURE_CONTENT_SAFETY_KEY and AZURE_CONTENT_SAFETY_ENDPOINT:
-    client = ContentSafetyClient(
-        endpoint=AZURE_CONTENT_SAFETY_ENDPOINT,
-        credential=AzureKeyCredential(AZURE_CONTENT_SAFETY_KEY)
-    )
+SAFETY_FALLBACK = {
+    "risk_score": 0.1,
+    "categories": {},
+    "flagged": False
+}
 
+# Results keyed by a hash of the normalized text, so retries and
+# reposted stories skip the network call
+_result_cache = TTLCache(
+    maxsize=int(os.getenv("CONTENT_SAFETY_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("CONTENT_SAFETY_CACHE_TTL", "3600")),
+    name="content_safety"
+)
 
-def analyze_content(text: str) -> dict:
-    fallback = {
-        "risk_score": 0.1,
-        "categories": {},
-        "flagged": False
+_bulkhead = bulkhead("content_safety", max_workers=16, max_queue=32)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_safety_client():
+    """
+    Process-wide Content Safety client, built on first use.
+    """
+    global _client
+
+    if _client is not None:
+        return _client
+
+    if not AZURE_CONTENT_SAFETY_KEY or not AZURE_CONTENT_SAFETY_ENDPOINT:
+        return None
+
+    with _client_lock:
+        if _client is None:
+            with timed("import azure.ai.contentsafety"):
+                from azure.ai.contentsafety import ContentSafetyClient
+                from azure.core.credentials import AzureKeyCredential
+
+            with timed("client content_safety"):
+                _client = ContentSafetyClient(
+                    endpoint=AZURE_CONTENT_SAFETY_ENDPOINT,
+                    credential=AzureKeyCredential(AZURE_CONTENT_SAFETY_KEY)
+                )
+
+    return _client
+
+
+def _cache_key(text: str) -> str:
+    normalized = " ".join(unicodedata.normalize("NFC", text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def cache_stats() -> dict:
+    return _result_cache.stats()
+
+
+def _analyze(key: str, text: str) -> dict:
+    from azure.ai.contentsafety.models import AnalyzeTextOptions
+
+    options = AnalyzeTextOptions(text=text)
+    with track_call("content_safety", "analyze_text"):
+        response = get_safety_client().analyze_text(options)
+
+    max_severity = 0
+    categories = {}
+
+    for item in response.categories_analysis:
+        category = item.category
+        severity = item.severity or 0
+
+        categories[category] = severity
+        max_severity = max(max_severity, severity)
+
+    # Normalize severity (Azure scale is 0–4)
+    risk_score = min(max_severity / 4, 1.0)
+
+    result = {
+        "risk_score": risk_score,
+        "categories": categories,
+        "flagged": risk_score >= 0.5
     }
 
-    if not client:
-        print("Content Safety client missing")
+    # Only real results are cached, never the fallback
+    _result_cache.set(key, result)
+    return deepcopy(result)
+
+
+def analyze_content(text: str) -> dict:
+    """
+    Severity-based risk for `text`. Errors return SAFETY_FALLBACK, but a
+    saturated bulkhead raises BulkheadFull: moderation must not pass
+    content it never checked.
+    """
+    fallback = deepcopy(SAFETY_FALLBACK)
+
+    if not get_safety_client():
+        logger.warning("Content Safety client missing")
+        FALLBACKS.labels("content_safety", "no_client").inc()
         return fallback
 
-    try:
-        options = AnalyzeTextOptions(text=text)
-        response = client.analyze_text(options)
+    key = _cache_key(text)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return deepcopy(cached)
 
-        max_severity = 0
-        categories = {}
+    try:
+        return _bulkhead.submit(_analyze, key, text).result()
+    except BulkheadFull:
+        raise
+    except Exception as e:
+        logger.warning("Content Safety error", extra={"error": str(e)})
+        FALLBACKS.labels("content_safety", "error").inc()
+        return fallback
 
-        for item in response.categories_analysis:
-            category = item.category
-            severity = item.severity or 0
 
-            categories[category] = severity
-            max_severity = max(max_severity, severity)
+async def analyze_content_async(text: str) -> dict:
+    """
+    analyze_content for async callers. Cache hits return without a
+    thread; misses are awaited on the Content Safety bulkhead, and
+    BulkheadFull propagates the same way.
+    """
+    fallback = deepcopy(SAFETY_FALLBACK)
 
-        # Normalize severity (Azure scale is 0–4)
-        risk_score = min(max_severity / 4, 1.0)
+    if not get_safety_client():
+        logger.warning("Content Safety client missing")
+        FALLBACKS.labels("content_safety", "no_client").inc()
+        return fallback
 
-        return {
-            "risk_score": risk_score,
-            "categories": categories,
-            "flagged": risk_score >= 0.5
-        }
+    key = _cache_key(text)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return deepcopy(cached)
 
+    try:
+        return await _bulkhead.run(_analyze, key, text)
+    except BulkheadFull:
+        raise
     except Exception as e:
-        print("Content Safety error:", e)
-        return fallback
\ No newline at end of file
+        logger.warning("Content Safety error", extra={"error": str(e)})
+        FALLBACKS.labels("content_safety", "error").inc()
+        return fallback
@@ -0,0 +1,98 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from services.metrics import BULKHEAD_REJECTIONS
+
+
+class BulkheadFull(RuntimeError):
+    """
+    Raised instead of queueing when a dependency's bulkhead is saturated.
+    """
+
+
+class Bulkhead:
+    """
+    Bounded executor for one external dependency.
+
+    At most `max_workers` calls run at once and at most `max_queue` more
+    wait behind them; anything beyond that fails fast with BulkheadFull,
+    so a slow dependency can only exhaust its own threads.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rejected = 0
+
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"bulkhead-{name}"
+        )
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                BULKHEAD_REJECTIONS.labels(self.name).inc()
+                raise BulkheadFull(f"{self.name} is at capacity")
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+
+        # Also fires when the future is cancelled before it runs
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Await `fn` on this bulkhead from async code.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(in_flight, self.max_workers),
+            "queued": max(in_flight - self.max_workers, 0),
+            "rejected": self.rejected
+        }
+
+
+_bulkheads = {}
+_bulkheads_lock = threading.Lock()
+
+
+def bulkhead(name: str, max_workers: int, max_queue: int) -> Bulkhead:
+    """
+    The named bulkhead, created on first use. BULKHEAD_<NAME>_WORKERS and
+    BULKHEAD_<NAME>_QUEUE override the caller's defaults.
+    """
+    with _bulkheads_lock:
+        if name not in _bulkheads:
+            prefix = f"BULKHEAD_{name.upper()}"
+            _bulkheads[name] = Bulkhead(
+                name,
+                max_workers=int(os.getenv(f"{prefix}_WORKERS", str(max_workers))),
+                max_queue=int(os.getenv(f"{prefix}_QUEUE", str(max_queue)))
+            )
+        return _bulkheads[name]
+
+
+def bulkhead_stats() -> dict:
+    with _bulkheads_lock:
+        return {name: b.stats() for name, b in _bulkheads.items()}
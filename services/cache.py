@@ -0,0 +1,168 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from services.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and hit/miss counters.
+    Named caches also report lookups to /metrics.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    self._count("hit")
+                    return value
+                del self._data[key]
+            self.misses += 1
+            self._count("miss")
+            return default
+
+    def _count(self, result: str):
+        if self.name:
+            CACHE_LOOKUPS.labels(self.name, result).inc()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class StaleWhileRevalidate:
+    """
+    Single shared value with stale-while-revalidate semantics.
+
+    Fresh for `ttl` seconds; for a further `stale_ttl` seconds the old
+    value is served while one background refresh runs. Cold or fully
+    expired loads block, but only one loader call runs at a time.
+    """
+
+    def __init__(self, loader, ttl: float, stale_ttl: float, name: str = "swr"):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._value = _MISSING
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def get(self) -> Any:
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            if self._value is not _MISSING and age < self.ttl:
+                self.hits += 1
+                CACHE_LOOKUPS.labels(self.name, "hit").inc()
+                return self._value
+
+            if self._value is not _MISSING and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                CACHE_LOOKUPS.labels(self.name, "stale").inc()
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(
+                        target=self._background_refresh,
+                        name=f"{self.name}-refresh",
+                        daemon=True
+                    ).start()
+                return self._value
+
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, "miss").inc()
+
+        with self._load_lock:
+            # Another caller may have loaded it while we waited
+            with self._lock:
+                if self._value is not _MISSING and time.monotonic() - self._loaded_at < self.ttl:
+                    return self._value
+            return self._load()
+
+    def _background_refresh(self):
+        try:
+            with self._load_lock:
+                self._load()
+        except Exception as e:
+            logger.warning("Cache refresh failed", extra={"cache": self.name, "error": str(e)})
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load(self) -> Any:
+        with self._lock:
+            generation = self._generation
+
+        value = self.loader()
+
+        with self._lock:
+            # Don't resurrect data that was invalidated mid-load
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = _MISSING
+            self._generation += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW_SECONDS", "60"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "4"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    Trips open once the error rate over the last `window` seconds reaches
+    `error_rate` (with at least `min_calls` samples). After `open_seconds`
+    a single half-open probe is let through: success closes the breaker,
+    failure re-opens it. Never sleeps; callers just skip open breakers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: float = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+        self._probe_id = 0
+        self._calls = deque()  # (timestamp, ok, latency)
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        return failures / len(self._calls)
+
+    def acquire(self):
+        """
+        Permit for one call, or None if the call may not go out now.
+        In half-open state only one probe is allowed until it reports back
+        or is released; a probe that does neither is replaced after
+        `open_seconds`. Pass the permit to release() if the call is
+        dropped (cancelled, rejected, abandoned) without an outcome.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state != HALF_OPEN:
+                return None
+
+            if self._probe_in_flight and now - self._probe_started_at < self.open_seconds:
+                return None
+
+            if self._probe_in_flight:
+                logger.warning("Stale breaker probe replaced", extra={"breaker": self.name})
+            self._probe_id += 1
+            self._probe_in_flight = True
+            self._probe_started_at = now
+            return self._probe_id
+
+    def allow_request(self) -> bool:
+        """
+        True if a call may go out now (see acquire).
+        """
+        return self.acquire() is not None
+
+    def release(self, permit):
+        """
+        Give back a permit whose call never reported success or failure.
+        Only matters for the half-open probe.
+        """
+        with self._lock:
+            if permit and permit == self._probe_id and self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                logger.info("Breaker closed after successful probe", extra={"breaker": self.name})
+                self.state = CLOSED
+                self._probe_in_flight = False
+                self._calls.clear()
+
+            self._calls.append((now, True, latency))
+            self._prune(now)
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, False, latency))
+            self._prune(now)
+
+            if self.state == HALF_OPEN:
+                self._trip(now)
+            elif (
+                self.state == CLOSED
+                and len(self._calls) >= self.min_calls
+                and self._error_rate() >= self.error_rate_threshold
+            ):
+                self._trip(now)
+
+    def _trip(self, now: float):
+        logger.warning(
+            "Breaker opened",
+            extra={"breaker": self.name, "error_rate": round(self._error_rate(), 3)}
+        )
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = sorted(latency for _, _, latency in self._calls)
+            return {
+                "state": self.state,
+                "calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "avg_latency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "p95_latency": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None
+            }
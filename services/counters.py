@@ -0,0 +1,222 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from services.firebase import get_db
+from services.cache import TTLCache
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+# Increments are buffered in memory and written at most once per
+# interval per document, instead of one write per request
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "1.0"))
+
+# 0 writes totals onto the document itself; N > 0 spreads them over
+# N shard subdocuments so a hot document never takes every write
+COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", "0"))
+COUNTER_SHARDS_COLLECTION = "counter_shards"
+
+_pending: "Counter[tuple]" = Counter()
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+# Documents already seen to exist, so only the first increment pays a read
+_known_docs = TTLCache(maxsize=10000, ttl=600, name="counter_targets")
+
+
+class UnknownDocument(LookupError):
+    """
+    Raised by increment() for a document that does not exist.
+    """
+
+
+def _check_doc_id(doc_id: str):
+    # Anything with a slash would address another collection or subcollection
+    if not doc_id or "/" in doc_id or doc_id in (".", "..") or (
+        doc_id.startswith("__") and doc_id.endswith("__")
+    ):
+        raise ValueError(f"Invalid document id: {doc_id!r}")
+
+
+def increment(collection: str, doc_id: str, field: str, amount: int = 1):
+    """
+    Buffer an increment; it reaches Firestore on the next flush.
+    Raises ValueError for a malformed id and UnknownDocument if the
+    document does not exist, before anything is buffered.
+    """
+    _check_doc_id(doc_id)
+
+    key = (collection, doc_id)
+    if not _known_docs.get(key):
+        with track_call("firestore", "counter_target_get"):
+            snapshot = get_db().collection(collection).document(doc_id).get(field_paths=[])
+        if not snapshot.exists:
+            raise UnknownDocument(f"{collection}/{doc_id}")
+        _known_docs.set(key, True)
+
+    _ensure_flusher()
+    with _pending_lock:
+        _pending[(collection, doc_id, field)] += amount
+
+
+def pending_count() -> int:
+    with _pending_lock:
+        return len(_pending)
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="counter-flusher", daemon=True)
+            _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(COUNTER_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception("Counter flush failed")
+
+
+def _requeue(doc_key: tuple, fields: dict):
+    collection, doc_id = doc_key
+    with _pending_lock:
+        for field, amount in fields.items():
+            _pending[(collection, doc_id, field)] += amount
+
+
+def _target(db, collection: str, doc_id: str):
+    doc_ref = db.collection(collection).document(doc_id)
+    if COUNTER_SHARDS <= 0:
+        return doc_ref
+    return doc_ref.collection(COUNTER_SHARDS_COLLECTION).document(
+        str(random.randrange(COUNTER_SHARDS))
+    )
+
+
+def _write(writer, ref, fields: dict):
+    from google.cloud.firestore import Increment
+
+    update = {field: Increment(amount) for field, amount in fields.items()}
+    if COUNTER_SHARDS > 0:
+        # Shard documents are created on first use
+        writer.set(ref, update, merge=True)
+    else:
+        writer.update(ref, update)
+
+
+class _DirectWriter:
+    """
+    Batch-shaped adapter that writes immediately.
+    """
+
+    @staticmethod
+    def set(ref, data, merge=False):
+        ref.set(data, merge=merge)
+
+    @staticmethod
+    def update(ref, data):
+        ref.update(data)
+
+
+def flush() -> int:
+    """
+    Write all buffered increments, one write per document, in batches.
+    Failed writes are put back for the next flush, except for documents
+    that no longer exist. Returns the number of documents written.
+    """
+    with _flush_lock:
+        with _pending_lock:
+            if not _pending:
+                return 0
+            drained = dict(_pending)
+            _pending.clear()
+
+        by_doc = defaultdict(dict)
+        for (collection, doc_id, field), amount in drained.items():
+            if amount:
+                by_doc[(collection, doc_id)][field] = amount
+
+        from google.api_core.exceptions import NotFound
+
+        db = get_db()
+        items = list(by_doc.items())
+        written = 0
+
+        for start in range(0, len(items), 500):
+            chunk = []
+            for doc_key, fields in items[start:start + 500]:
+                try:
+                    chunk.append((doc_key, _target(db, *doc_key), fields))
+                except Exception as e:
+                    # One bad key must not cost every other buffered increment
+                    logger.warning("Dropping increments for invalid document", extra={"doc": "/".join(doc_key), "error": str(e)})
+            if not chunk:
+                continue
+
+            batch = db.batch()
+            for _, ref, fields in chunk:
+                _write(batch, ref, fields)
+
+            try:
+                with track_call("firestore", "counter_flush"):
+                    batch.commit()
+                written += len(chunk)
+                continue
+            except Exception as e:
+                logger.warning("Counter batch failed, retrying per document", extra={"error": str(e)})
+
+            # One missing document fails the whole batch; isolate it
+            for doc_key, ref, fields in chunk:
+                try:
+                    _write(_DirectWriter, ref, fields)
+                    written += 1
+                except NotFound:
+                    logger.warning("Dropping increments for missing document", extra={"doc": "/".join(doc_key)})
+                except Exception as e:
+                    logger.warning("Counter write failed", extra={"doc": "/".join(doc_key), "error": str(e)})
+                    _requeue(doc_key, fields)
+
+        return written
+
+
+def add_shard_totals(collection: str, docs: list, fields: tuple) -> list:
+    """
+    Add sharded counter totals onto `docs` (dicts with an "id"), in one
+    read of every shard. No-op when sharding is off.
+    """
+    if COUNTER_SHARDS <= 0 or not docs:
+        return docs
+
+    db = get_db()
+    refs = [
+        db.collection(collection).document(doc["id"])
+        .collection(COUNTER_SHARDS_COLLECTION).document(str(shard))
+        for doc in docs
+        for shard in range(COUNTER_SHARDS)
+    ]
+
+    totals = defaultdict(Counter)
+    for snapshot in db.get_all(refs, field_paths=list(fields)):
+        if not snapshot.exists:
+            continue
+        doc_id = snapshot.reference.parent.parent.id
+        data = snapshot.to_dict()
+        for field in fields:
+            totals[doc_id][field] += data.get(field, 0)
+
+    for doc in docs:
+        for field in fields:
+            doc[field] = doc.get(field, 0) + totals[doc["id"]][field]
+    return docs
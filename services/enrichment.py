@@ -0,0 +1,217 @@
+import os
+import time
+import queue
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from services.firebase import get_db
+from services.ai_pipeline import run_journal_ai
+from services.rollups import as_utc, record_journal
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+# "inline" runs the AI pipeline inside POST /journals,
+# "background" stores the entry first and enriches it on a worker pool
+ENRICHMENT_MODE = os.getenv("JOURNAL_ENRICHMENT_MODE", "inline")
+ENRICHMENT_WORKERS = int(os.getenv("JOURNAL_ENRICHMENT_WORKERS", "4"))
+# Jobs beyond this stay "pending" in Firestore until the next sweep
+ENRICHMENT_QUEUE_SIZE = int(os.getenv("JOURNAL_ENRICHMENT_QUEUE_SIZE", "1000"))
+# A pending entry untouched for this long is assumed lost (restart,
+# scale-to-zero) and may be picked up by any process
+ENRICHMENT_STALE_SECONDS = float(os.getenv("JOURNAL_ENRICHMENT_STALE_SECONDS", "300"))
+
+STATUS_PENDING = "pending"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+ENRICHMENT_FIELDS = (
+    "sentiment",
+    "sentiment_scores",
+    "key_phrases",
+    "risk_score",
+    "flagged",
+    "reflection",
+    "themes",
+    "follow_up_question"
+)
+
+_jobs: "queue.Queue[tuple]" = queue.Queue(maxsize=ENRICHMENT_QUEUE_SIZE)
+_workers = []
+_workers_lock = threading.Lock()
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def enrichment_fields(ai_output: dict) -> dict:
+    """
+    Map run_journal_ai output onto the journal document fields.
+    """
+    return {field: ai_output.get(field) for field in ENRICHMENT_FIELDS}
+
+
+def pending_fields() -> dict:
+    """
+    Marker for an entry that has not been enriched yet. AI fields are
+    left off the document so readers fall back to their usual defaults.
+    """
+    return {"enrichment_status": STATUS_PENDING}
+
+
+def _is_stale(moment, now) -> bool:
+    return moment is None or as_utc(moment) < now - timedelta(seconds=ENRICHMENT_STALE_SECONDS)
+
+
+def _claim_in_transaction(transaction, doc_ref) -> bool:
+    snapshot = doc_ref.get(
+        field_paths=["enrichment_status", "enrichment_claimed_at"],
+        transaction=transaction
+    )
+    if not snapshot.exists:
+        return False
+
+    data = snapshot.to_dict()
+    now = datetime.now(timezone.utc)
+    if data.get("enrichment_status") != STATUS_PENDING or not _is_stale(data.get("enrichment_claimed_at"), now):
+        return False
+
+    transaction.update(doc_ref, {"enrichment_claimed_at": now})
+    return True
+
+
+def claim_pending(doc_ref) -> bool:
+    """
+    Take a pending entry for this process. A sweep can queue an entry
+    that another process (or a stream) is already enriching; only one
+    of them gets it, so the rollup never counts it twice.
+    """
+    from google.cloud import firestore
+    with track_call("firestore", "enrichment_claim"):
+        return firestore.transactional(_claim_in_transaction)(get_db().transaction(), doc_ref)
+
+
+def _enrich(journal_id: str, journal_data: dict):
+    doc_ref = get_db().collection("journals").document(journal_id)
+
+    try:
+        if not claim_pending(doc_ref):
+            return
+    except Exception as e:
+        # Left pending; a later sweep retries it
+        logger.warning("Enrichment claim failed", extra={"journal_id": journal_id, "error": str(e)})
+        return
+
+    try:
+        ai_output = run_journal_ai(journal_data["content"])
+        fields = {
+            **enrichment_fields(ai_output),
+            "enrichment_status": STATUS_COMPLETE
+        }
+        with track_call("firestore", "journal_enrich"):
+            doc_ref.update(fields)
+    except Exception as e:
+        logger.warning("Enrichment failed", extra={"journal_id": journal_id, "error": str(e)})
+        fields = {"enrichment_status": STATUS_FAILED}
+        try:
+            doc_ref.update(fields)
+        except Exception as update_error:
+            logger.warning(
+                "Could not mark enrichment failed",
+                extra={"journal_id": journal_id, "error": str(update_error)}
+            )
+
+    # Counted either way, so rollups agree with a rebuild from journals
+    record_journal(journal_data["uid"], {**journal_data, **fields})
+
+
+def _worker():
+    while True:
+        journal_id, journal_data = _jobs.get()
+        try:
+            _enrich(journal_id, journal_data)
+        finally:
+            _jobs.task_done()
+
+
+def _ensure_workers():
+    with _workers_lock:
+        while len(_workers) < ENRICHMENT_WORKERS:
+            thread = threading.Thread(
+                target=_worker,
+                name=f"journal-enrichment-{len(_workers)}",
+                daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+
+
+def enqueue_enrichment(journal_id: str, journal_data: dict) -> bool:
+    """
+    Queue a stored journal for background AI enrichment. Returns False
+    when the queue is full; the entry stays pending for the next sweep.
+    """
+    _ensure_workers()
+    try:
+        _jobs.put_nowait((journal_id, dict(journal_data)))
+    except queue.Full:
+        logger.warning("Enrichment queue full, deferring", extra={"journal_id": journal_id})
+        return False
+    return True
+
+
+def requeue_stale_pending() -> int:
+    """
+    Queue entries left pending by a process that stopped before
+    enriching them. Returns the number queued.
+    """
+    now = datetime.now(timezone.utc)
+    # Equality-only query, so no composite index; age is checked here
+    query = (
+        get_db().collection("journals")
+        .where("enrichment_status", "==", STATUS_PENDING)
+        .select(["uid", "session_id", "title", "content", "created_at", "enrichment_claimed_at"])
+    )
+
+    queued = 0
+    for doc in query.stream():
+        data = doc.to_dict()
+        if not _is_stale(data.get("created_at"), now) or not _is_stale(data.get("enrichment_claimed_at"), now):
+            continue
+        if not enqueue_enrichment(doc.id, data):
+            break
+        queued += 1
+
+    if queued:
+        logger.info("Requeued pending journals", extra={"count": queued})
+    return queued
+
+
+def _sweep_loop():
+    while True:
+        try:
+            requeue_stale_pending()
+        except Exception:
+            logger.exception("Pending enrichment sweep failed")
+        time.sleep(ENRICHMENT_STALE_SECONDS)
+
+
+def start_pending_sweeper():
+    """
+    Sweep for lost pending entries now and every ENRICHMENT_STALE_SECONDS.
+    """
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_loop,
+                name="journal-enrichment-sweep",
+                daemon=True
+            )
+            _sweeper.start()
+
+
+def queue_depth() -> int:
+    return _jobs.qsize()
@@ -1,10 +1,34 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, auth, storage
 import os
 import json
+import threading
+from services.bulkheads import bulkhead
+from services.startup import timed
 
+# Clients are built on first use (or by the startup warm-up), so importing
+# this module costs nothing on a cold start
+_db = None
+_async_db = None
+_bucket = None
+_app_ready = False
+_lock = threading.RLock()
+
+
+def _init_app():
+    """
+    Initialize the default Firebase app once. Call with _lock held.
+    """
+    global _app_ready
+    if _app_ready:
+        return
+
+    with timed("import firebase_admin"):
+        import firebase_admin
+        from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        _app_ready = True
+        return
 
-if not firebase_admin._apps:
     cred = None
 
     # 1️⃣ Render Secret File (production)
@@ -35,22 +59,66 @@ if not firebase_admin._apps:
                 "- firebase-service-account.json locally"
             ) from e
 
-    firebase_admin.initialize_app(
-        cred,
-        {
-            "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET")
-        }
-    )
+    with timed("client firebase_app"):
+        firebase_admin.initialize_app(
+            cred,
+            {
+                "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET")
+            }
+        )
+    _app_ready = True
+
 
 # -------------------------------------------------
 # Clients
 # -------------------------------------------------
-db = firestore.client()
-firebase_auth = auth
-bucket = storage.bucket()
-
 def get_db():
-    return db
+    global _db
+    if _db is None:
+        with _lock:
+            if _db is None:
+                _init_app()
+                from firebase_admin import firestore
+                with timed("client firestore"):
+                    _db = firestore.client()
+    return _db
+
+def get_async_db():
+    # Same project, for async def routes
+    global _async_db
+    if _async_db is None:
+        with _lock:
+            if _async_db is None:
+                _init_app()
+                from firebase_admin import firestore_async
+                with timed("client firestore_async"):
+                    _async_db = firestore_async.client()
+    return _async_db
 
 def get_bucket():
-    return bucket
+    global _bucket
+    if _bucket is None:
+        with _lock:
+            if _bucket is None:
+                _init_app()
+                from firebase_admin import storage
+                with timed("client storage_bucket"):
+                    _bucket = storage.bucket()
+    return _bucket
+
+def init_app():
+    if not _app_ready:
+        with _lock:
+            _init_app()
+
+def get_auth():
+    """
+    firebase_admin.auth, with the app initialized.
+    """
+    init_app()
+    from firebase_admin import auth
+    return auth
+
+
+# Blocking Firestore work (transactions, backfills) started from async routes
+firestore_bulkhead = bulkhead("firestore", max_workers=16, max_queue=256)
@@ -1,13 +1,25 @@
 import os
+import re
 import json
 import time
-from typing import Dict
+import queue
+import asyncio
+import logging
+import threading
+from copy import deepcopy
+from concurrent.futures import wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+from typing import Dict, Iterator, Tuple
 from dotenv import load_dotenv
-from google import genai
 from services.azure_safety import analyze_content
+from services.circuit_breaker import CircuitBreaker
+from services.bulkheads import BulkheadFull, bulkhead
+from services.startup import timed
+from services.metrics import FAILOVER_HOPS, FALLBACKS, GEMINI_TOKENS, track_call
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 SYSTEM_PROMPT = """
@@ -94,9 +106,103 @@ MODEL_PRIORITY = [
     "models/gemma-3-4b-it"
 ]
 
-client = None
-if GEMINI_API_KEY:
-    client = genai.Client(api_key=GEMINI_API_KEY)
+# Schema for Gemini's constrained JSON output mode
+REFLECTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "reflection": {"type": "STRING"},
+        "themes": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "follow_up_question": {"type": "STRING"}
+    },
+    "required": ["reflection", "themes", "follow_up_question"],
+    # Reflection first, so streamed text starts arriving immediately
+    "propertyOrdering": ["reflection", "themes", "follow_up_question"]
+}
+
+# Wrapped summaries: short prompt, cheaper model
+GEMINI_SUMMARY_MODEL = os.getenv("GEMINI_SUMMARY_MODEL", "models/gemini-flash-lite-latest")
+
+SUMMARY_PROMPT = """
+You write a short, warm recap of someone's journaling over a period of time.
+Use only the statistics given. No diagnosis, no clinical language, no advice.
+Gentle, human tone. The narrative is 3–4 sentences; the title is under 8 words.
+"""
+
+SUMMARY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": {"type": "STRING"},
+        "narrative": {"type": "STRING"}
+    },
+    "required": ["title", "narrative"],
+    "propertyOrdering": ["title", "narrative"]
+}
+
+# Gemma models reject system instructions, cached contents and
+# response_mime_type / response_schema, so they get the prompt inline
+PROMPT_ONLY_MODEL_PREFIXES = ("models/gemma-",)
+
+# Context caching for SYSTEM_PROMPT (falls back to a plain system
+# instruction where the model or prompt size doesn't allow a cache)
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "true") == "true"
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+# After a failed cache creation, wait this long before trying again
+GEMINI_CONTEXT_CACHE_RETRY = 600
+
+# Hedging: fire the next model if the current one is slower than this (0 disables)
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER_SECONDS", "4"))
+# Overall budget for one reflection before the built-in fallback is used
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE_SECONDS", "10"))
+
+_bulkhead = bulkhead(
+    "gemini",
+    max_workers=int(os.getenv("GEMINI_WORKERS", "16")),
+    max_queue=16
+)
+
+# One breaker per model so a failing model is skipped without a wasted call
+_breakers = {model: CircuitBreaker(model) for model in MODEL_PRIORITY}
+_breakers.setdefault(GEMINI_SUMMARY_MODEL, CircuitBreaker(GEMINI_SUMMARY_MODEL))
+
+REFLECTION_FALLBACK = {
+    "reflection": (
+        "The Quiet Thinker is here, holding what you've shared with care. "
+        "Something in your story is asking to be seen — and you gave it a voice by writing it down."
+    ),
+    "themes": ["the quiet thinker present", "story beginning to surface"],
+    "follow_up_question": "Which part of you felt the most alive — or the most tired — in this moment you described?"
+}
+
+# model -> (cached content name or None, monotonic time to refresh at)
+_context_caches = {}
+_context_cache_lock = threading.Lock()
+
+# model -> accumulated token counts
+_token_usage = {}
+_token_usage_lock = threading.Lock()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """
+    Process-wide google-genai client, built on first use.
+    """
+    global _client
+
+    if _client is not None or not GEMINI_API_KEY:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            # The SDK import is deferred to here to keep cold starts cheap
+            with timed("import google.genai"):
+                from google import genai
+            with timed("client gemini"):
+                _client = genai.Client(api_key=GEMINI_API_KEY)
+
+    return _client
 
 
 def _clean_json(raw: str) -> dict:
@@ -106,49 +212,686 @@ def _clean_json(raw: str) -> dict:
     return json.loads(raw)
 
 
-def generate_reflection(text: str) -> Dict:
-    fallback = {
-        "reflection": (
-            "The Quiet Thinker is here, holding what you've shared with care. "
-            "Something in your story is asking to be seen — and you gave it a voice by writing it down."
-        ),
-        "themes": ["the quiet thinker present", "story beginning to surface"],
-        "follow_up_question": "Which part of you felt the most alive — or the most tired — in this moment you described?"
-    }
+def _close_containers(stack: list) -> str:
+    return "".join(reversed(stack))
 
-    if not client:
-        return fallback
 
-    for model in MODEL_PRIORITY:
+def _salvage_json(raw: str) -> dict:
+    """
+    Best-effort parse of a truncated or chatty JSON object: ignores text
+    around the object, closes a cut-off string and any open brackets, and
+    otherwise backs off to the last complete member.
+    """
+    start = raw.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in model output")
+    text = raw[start:]
+
+    stack = []
+    cuts = []  # (index of a top-level-or-nested comma, open containers there)
+    in_string = False
+    escaped = False
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return json.loads(text[:i + 1])
+        elif ch == ",":
+            cuts.append((i, list(stack)))
+
+    # Truncated: close everything where the text stopped, unless that would
+    # keep a cut-off string, in which case back off to a complete member first
+    closed = text + _close_containers(stack)
+    backoffs = [text[:i] + _close_containers(open_at) for i, open_at in reversed(cuts)]
+    if in_string:
+        tail = text[:-1] if escaped else text
+        candidates = backoffs + [tail + '"' + _close_containers(stack)]
+    else:
+        candidates = [closed] + backoffs
+
+    for candidate in candidates:
         try:
-            print(f"[AI] Trying model → {model}")
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+
+    raise ValueError("Could not salvage JSON from model output")
+
+
+def _parse_reflection(raw: str) -> dict:
+    """
+    Strict parse first, then salvage. A result without reflection
+    text is treated as a failure so the caller can move on.
+    """
+    try:
+        parsed = _clean_json(raw)
+    except ValueError:
+        # Only salvage when the reflection itself arrived whole;
+        # themes / follow_up_question fall back per field
+        if not _scan_string_field(raw, "reflection")[1]:
+            raise
+        parsed = _salvage_json(raw)
+        logger.info("Salvaged partial JSON from model output")
+
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("reflection"), str) or not parsed["reflection"].strip():
+        raise ValueError("Model output has no reflection")
+    return parsed
+
+
+def _prompt_only(model: str) -> bool:
+    return model.startswith(PROMPT_ONLY_MODEL_PREFIXES)
+
+
+def _cached_context(model: str):
+    """
+    Name of a cached context holding SYSTEM_PROMPT for this model,
+    created on first use; its TTL is extended shortly before it runs out.
+    """
+    if not GEMINI_CONTEXT_CACHE:
+        return None
 
-            response = client.models.generate_content(
+    now = time.monotonic()
+    name, refresh_at = _context_caches.get(model, (None, 0.0))
+    if now < refresh_at:
+        return name
+
+    with _context_cache_lock:
+        name, refresh_at = _context_caches.get(model, (None, 0.0))
+        if now < refresh_at:
+            return name
+
+        from google.genai import types
+        client = get_gemini_client()
+        ttl = f"{GEMINI_CONTEXT_CACHE_TTL}s"
+
+        if name:
+            # Extend the live cache rather than paying for a second one
+            try:
+                client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                _context_caches[model] = (name, now + GEMINI_CONTEXT_CACHE_TTL * 0.9)
+                return name
+            except Exception as e:
+                logger.info("Context cache refresh failed, recreating", extra={"model": model, "error": str(e)})
+
+        replaced = name
+        try:
+            cache = client.caches.create(
                 model=model,
-                contents=SYSTEM_PROMPT + "\n\nJournal entry:\n" + text
+                config=types.CreateCachedContentConfig(
+                    display_name="anchor-reflection-system-prompt",
+                    system_instruction=SYSTEM_PROMPT,
+                    ttl=ttl
+                )
             )
+            name = cache.name
+            refresh_at = now + GEMINI_CONTEXT_CACHE_TTL * 0.9
+            logger.info("Context cache ready", extra={"model": model})
+        except Exception as e:
+            logger.warning("Context cache unavailable", extra={"model": model, "error": str(e)})
+            name = None
+            refresh_at = now + GEMINI_CONTEXT_CACHE_RETRY
 
-            raw = response.text.strip()
+        _context_caches[model] = (name, refresh_at)
 
+        if replaced:
             try:
-                parsed = _clean_json(raw)
-                return {
-                    "reflection": parsed.get("reflection", fallback["reflection"]),
-                    "themes": parsed.get("themes", fallback["themes"]),
-                    "follow_up_question": parsed.get("follow_up_question", fallback["follow_up_question"])
-                }
+                client.caches.delete(name=replaced)
             except Exception:
-                print("[AI] JSON parse failed, trying next model.")
-                print("Raw output:", raw)
-                continue
+                # Usually already gone; otherwise it expires on its own TTL
+                pass
+        return name
+
+
+def _is_cache_miss(error: Exception) -> bool:
+    """
+    True for errors caused by a cached context that has expired or been
+    deleted; those are the only ones that warrant a new cache.
+    """
+    message = str(error).lower().replace(" ", "").replace("_", "")
+    return "cachedcontent" in message
+
+
+def _drop_cached_context(model: str, error: Exception):
+    if not _is_cache_miss(error):
+        return
+    with _context_cache_lock:
+        name, _ = _context_caches.get(model, (None, 0.0))
+        # A None entry is the retry backoff after a failed create; keep it
+        if name:
+            _context_caches.pop(model, None)
+
+
+def _request(model: str, text: str):
+    """
+    contents and config for one reflection call. SYSTEM_PROMPT goes in as
+    a (cached) system instruction, and output is schema-constrained JSON,
+    wherever the model supports it.
+    """
+    from google.genai import types
+
+    if _prompt_only(model):
+        return SYSTEM_PROMPT + "\n\nJournal entry:\n" + text, None
+
+    config = {
+        "response_mime_type": "application/json",
+        "response_schema": REFLECTION_SCHEMA
+    }
+
+    cache_name = _cached_context(model)
+    if cache_name:
+        config["cached_content"] = cache_name
+    else:
+        config["system_instruction"] = SYSTEM_PROMPT
+
+    return "Journal entry:\n" + text, types.GenerateContentConfig(**config)
+
+
+def _record_usage(model: str, usage):
+    if usage is None:
+        return
+
+    with _token_usage_lock:
+        totals = _token_usage.setdefault(model, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "output_tokens": 0
+        })
+        totals["calls"] += 1
+        totals["prompt_tokens"] += usage.prompt_token_count or 0
+        totals["cached_tokens"] += usage.cached_content_token_count or 0
+        totals["output_tokens"] += usage.candidates_token_count or 0
+
+    GEMINI_TOKENS.labels(model, "prompt").inc(usage.prompt_token_count or 0)
+    GEMINI_TOKENS.labels(model, "cached").inc(usage.cached_content_token_count or 0)
+    GEMINI_TOKENS.labels(model, "output").inc(usage.candidates_token_count or 0)
+
+
+def token_usage() -> dict:
+    """
+    Per-model token totals: prompt (including cached), cached and output.
+    """
+    with _token_usage_lock:
+        return {model: dict(totals) for model, totals in _token_usage.items()}
+
+
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def _scan_string_field(raw: str, key: str) -> Tuple[str, bool]:
+    """
+    Decode as much of a JSON string value as has arrived so far, e.g. the
+    reflection text while the model is still streaming. Also reports
+    whether the closing quote has been seen.
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(key), raw)
+    if not match:
+        return "", False
+
+    out = []
+    i = match.end()
+    while i < len(raw):
+        ch = raw[i]
+        if ch == '"':
+            return "".join(out), True
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+
+        # Escape sequence: stop if it is cut off mid-chunk
+        if i + 1 >= len(raw):
+            break
+        esc = raw[i + 1]
+        if esc == "u":
+            if i + 6 > len(raw):
+                break
+            try:
+                out.append(chr(int(raw[i + 2:i + 6], 16)))
+            except ValueError:
+                break
+            i += 6
+            continue
+        out.append(_JSON_ESCAPES.get(esc, esc))
+        i += 2
+
+    return "".join(out), False
+
+
+def _partial_string_field(raw: str, key: str) -> str:
+    return _scan_string_field(raw, key)[0]
+
+
+def _reflection_result(parsed: dict, fallback: dict) -> Dict:
+    return {
+        "reflection": parsed.get("reflection", fallback["reflection"]),
+        "themes": parsed.get("themes", fallback["themes"]),
+        "follow_up_question": parsed.get("follow_up_question", fallback["follow_up_question"])
+    }
+
 
+def _routable_models():
+    """
+    (model, breaker permit) in MODEL_PRIORITY order, skipping models whose
+    breaker is open. Lazy, so a half-open probe is only claimed when the
+    model is tried.
+    """
+    for model in MODEL_PRIORITY:
+        permit = _breakers[model].acquire()
+        if permit is not None:
+            yield model, permit
+
+
+def model_health() -> dict:
+    return {model: breaker.snapshot() for model, breaker in _breakers.items()}
+
+
+def _call_model(model: str, text: str) -> dict:
+    """
+    One attempt against one model. Returns the parsed JSON or raises,
+    reporting the outcome to that model's breaker either way.
+    """
+    breaker = _breakers[model]
+    started = time.monotonic()
+
+    contents, config = _request(model, text)
+
+    try:
+        with track_call("gemini", model):
+            response = get_gemini_client().models.generate_content(
+                model=model,
+                contents=contents,
+                config=config
+            )
+        raw = (response.text or "").strip()
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - started)
+        # The cached context may have expired or been evicted
+        _drop_cached_context(model, e)
+        raise
+
+    _record_usage(model, response.usage_metadata)
+
+    try:
+        parsed = _parse_reflection(raw)
+    except Exception:
+        breaker.record_failure(time.monotonic() - started)
+        logger.warning("JSON parse failed", extra={"model": model, "raw_output": raw[:500]})
+        raise
+
+    breaker.record_success(time.monotonic() - started)
+    return parsed
+
+
+class _HedgedCall:
+    """
+    Hedged failover state for one reflection, shared by the sync and async
+    entry points; they differ only in how they wait on the in-flight calls.
+    """
+
+    def __init__(self, text: str, wrap=lambda future: future):
+        self.text = text
+        self.wrap = wrap
+        self.deadline = time.monotonic() + GEMINI_DEADLINE
+        self.models = _routable_models()
+        self.in_flight = {}
+        self.saturated = False
+
+    def launch(self) -> bool:
+        model, permit = next(self.models, (None, None))
+        if model is None:
+            return False
+        breaker = _breakers[model]
+        logger.info("Trying model", extra={"model": model})
+        try:
+            future = _bulkhead.submit(_call_model, model, self.text)
+        except BulkheadFull as e:
+            breaker.release(permit)
+            self.saturated = True
+            logger.warning("Gemini saturated", extra={"error": str(e)})
+            return False
+
+        # A call cancelled before it ran never reports to its breaker
+        future.add_done_callback(lambda f: f.cancelled() and breaker.release(permit))
+        self.in_flight[self.wrap(future)] = model
+        return True
+
+    def next_timeout(self):
+        """
+        How long to wait for the next completion, or None once there is
+        nothing left to wait for or the deadline has passed.
+        """
+        remaining = self.deadline - time.monotonic()
+        if not self.in_flight or remaining <= 0:
+            return None
+        return min(remaining, GEMINI_HEDGE_AFTER) if GEMINI_HEDGE_AFTER > 0 else remaining
+
+    def settle(self, done):
+        """
+        Handle the calls that finished (or none, on a hedge timeout).
+        Returns the first valid parsed reflection, else None.
+        """
+        if not done:
+            # Slow, not failed: hedge with the next model
+            if GEMINI_HEDGE_AFTER > 0 and self.launch():
+                FAILOVER_HOPS.labels("hedge").inc()
+                logger.info("Hedging", extra={"after_seconds": GEMINI_HEDGE_AFTER})
+            return None
+
+        for future in done:
+            model = self.in_flight.pop(future)
+            try:
+                return future.result()
+            except Exception as e:
+                logger.warning("Model failed", extra={"model": model, "error": str(e)})
+
+        if not self.in_flight and self.launch():
+            FAILOVER_HOPS.labels("failure").inc()
+        return None
+
+    def give_up(self):
+        if self.in_flight:
+            FALLBACKS.labels("gemini", "deadline").inc()
+            logger.warning("Gemini deadline reached, using fallback")
+        elif self.saturated:
+            # Nothing left running because the pool refused the next call
+            FALLBACKS.labels("gemini", "saturated").inc()
+            logger.warning("Gemini saturated, using fallback")
+        else:
+            FALLBACKS.labels("gemini", "all_failed").inc()
+            logger.warning("All models failed, using fallback")
+
+    def cancel_pending(self):
+        for future in self.in_flight:
+            future.cancel()
+
+
+def generate_reflection(text: str) -> Dict:
+    """
+    Reflection with hedged failover.
+    The first routable model is called; if it hasn't answered within
+    GEMINI_HEDGE_AFTER_SECONDS the next model is fired in parallel and the
+    first valid JSON wins. A failed call fails over straight away. After
+    GEMINI_DEADLINE_SECONDS the built-in fallback is returned and any
+    calls still running are ignored.
+    """
+    fallback = deepcopy(REFLECTION_FALLBACK)
+
+    if not get_gemini_client():
+        FALLBACKS.labels("gemini", "no_client").inc()
+        return fallback
+
+    call = _HedgedCall(text)
+    call.launch()
+    try:
+        while True:
+            timeout = call.next_timeout()
+            if timeout is None:
+                break
+            done, _ = wait(call.in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            parsed = call.settle(done)
+            if parsed is not None:
+                return _reflection_result(parsed, fallback)
+
+        call.give_up()
+        return fallback
+    finally:
+        call.cancel_pending()
+
+
+async def generate_reflection_async(text: str) -> Dict:
+    """
+    generate_reflection for async callers. Same hedging and deadline;
+    model calls run on the Gemini pool and are awaited, so no thread is
+    held while waiting on them.
+    """
+    fallback = deepcopy(REFLECTION_FALLBACK)
+
+    if not get_gemini_client():
+        FALLBACKS.labels("gemini", "no_client").inc()
+        return fallback
+
+    call = _HedgedCall(text, wrap=asyncio.wrap_future)
+    call.launch()
+    try:
+        while True:
+            timeout = call.next_timeout()
+            if timeout is None:
+                break
+            done, _ = await asyncio.wait(call.in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            parsed = call.settle(done)
+            if parsed is not None:
+                return _reflection_result(parsed, fallback)
+
+        call.give_up()
+        return fallback
+    finally:
+        call.cancel_pending()
+
+
+_STREAM_END = object()
+
+
+def _stream_chunks(model: str, contents, config, deadline: float):
+    """
+    Chunks of one streamed call. The call itself runs on the Gemini
+    bulkhead and hands chunks over through a queue, so the caller never
+    waits past `deadline` (TimeoutError) and a slow model cannot pin the
+    request threadpool. Raises BulkheadFull on the first next() when
+    the pool is saturated; closing the iterator stops the producer.
+    """
+    chunks = queue.Queue()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            with track_call("gemini_stream", model):
+                for chunk in get_gemini_client().models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config
+                ):
+                    if stopped.is_set():
+                        return
+                    chunks.put(chunk)
+            chunks.put(_STREAM_END)
         except Exception as e:
-            print(f"[AI] Model failed → {model}")
-            print("Reason:", e)
-            time.sleep(1)
+            chunks.put(e)
+
+    _bulkhead.submit(produce)
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise TimeoutError("Gemini stream deadline reached")
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+def stream_reflection(text: str) -> Iterator[Tuple[str, object]]:
+    """
+    Streaming variant of generate_reflection.
+    Yields ("token", str) as the reflection text grows, then a single
+    ("result", dict) with the parsed reflection, themes and follow-up question.
+    A model is only skipped if it fails before emitting any reflection text.
+    The whole stream is capped at GEMINI_DEADLINE_SECONDS.
+    """
+    fallback = deepcopy(REFLECTION_FALLBACK)
+    reason = "all_failed"
+
+    if get_gemini_client():
+        deadline = time.monotonic() + GEMINI_DEADLINE
+
+        for attempt, (model, permit) in enumerate(_routable_models()):
+            breaker = _breakers[model]
+            if time.monotonic() >= deadline:
+                breaker.release(permit)
+                reason = "deadline"
+                break
+            if attempt:
+                FAILOVER_HOPS.labels("failure").inc()
+
+            started = time.monotonic()
+            raw = ""
+            emitted = ""
+            stream_failed = False
+            usage = None
+
+            try:
+                logger.info("Streaming model", extra={"model": model})
+
+                contents, config = _request(model, text)
+                for chunk in _stream_chunks(model, contents, config, deadline):
+                    raw += chunk.text or ""
+                    usage = chunk.usage_metadata or usage
+
+                    partial = _partial_string_field(raw, "reflection")
+                    if len(partial) > len(emitted):
+                        yield "token", partial[len(emitted):]
+                        emitted = partial
+
+            except GeneratorExit:
+                # Client went away mid-stream: no outcome, but free the probe
+                breaker.release(permit)
+                raise
+            except BulkheadFull as e:
+                breaker.release(permit)
+                logger.warning("Gemini saturated", extra={"error": str(e)})
+                reason = "saturated"
+                break
+            except Exception as e:
+                stream_failed = True
+                breaker.record_failure(time.monotonic() - started)
+                _drop_cached_context(model, e)
+                logger.warning("Stream failed", extra={"model": model, "error": str(e)})
+                if not emitted:
+                    continue
+
+            _record_usage(model, usage)
 
-    print("[AI] All models failed → using fallback")
-    return fallback
+            try:
+                parsed = _parse_reflection(raw)
+                if not stream_failed:
+                    breaker.record_success(time.monotonic() - started)
+            except Exception:
+                if not stream_failed:
+                    breaker.record_failure(time.monotonic() - started)
+                if not emitted:
+                    logger.warning("JSON parse failed", extra={"model": model, "raw_output": raw[:500]})
+                    continue
+                # Keep what the user has already seen
+                parsed = {"reflection": emitted}
+
+            yield "result", _reflection_result(parsed, fallback)
+            return
+
+        FALLBACKS.labels("gemini", reason).inc()
+        logger.warning("Streaming reflection fell back", extra={"reason": reason})
+
+    yield "token", fallback["reflection"]
+    yield "result", fallback
+
+
+def generate_summary(period: str, stats: dict):
+    """
+    Title + narrative for a Wrapped period, from its statistics only.
+    Returns None if the summary model is unavailable, fails or misses
+    GEMINI_DEADLINE_SECONDS, so callers can fall back without caching
+    the fallback.
+    """
+    from google.genai import types
+
+    breaker = _breakers[GEMINI_SUMMARY_MODEL]
+    if not get_gemini_client():
+        return None
+    permit = breaker.acquire()
+    if permit is None:
+        return None
+
+    contents = (
+        f"Period: {period}\n"
+        f"Journals written: {stats['total_journals']}\n"
+        f"Active days: {stats['active_days']}\n"
+        f"Average mood score (0-100): {stats['average_mood_score']} ({stats['mood_label']})\n"
+        f"Top emotional themes: {', '.join(stats['top_themes'])}\n"
+        f"High intensity moments: {stats['high_risk_entries']}"
+    )
+
+    config = {
+        "response_mime_type": "application/json",
+        "response_schema": SUMMARY_SCHEMA,
+        "system_instruction": SUMMARY_PROMPT
+    }
+    if _prompt_only(GEMINI_SUMMARY_MODEL):
+        contents = SUMMARY_PROMPT + "\n" + contents
+        config = {}
+
+    def call():
+        with track_call("gemini", GEMINI_SUMMARY_MODEL):
+            return get_gemini_client().models.generate_content(
+                model=GEMINI_SUMMARY_MODEL,
+                contents=contents,
+                config=types.GenerateContentConfig(**config)
+            )
+
+    logger.info("Wrapped summary", extra={"model": GEMINI_SUMMARY_MODEL})
+    started = time.monotonic()
+    try:
+        future = _bulkhead.submit(call)
+    except BulkheadFull as e:
+        breaker.release(permit)
+        FALLBACKS.labels("wrapped_summary", "saturated").inc()
+        logger.warning("Gemini saturated", extra={"error": str(e)})
+        return None
+
+    try:
+        response = future.result(timeout=GEMINI_DEADLINE)
+        _record_usage(GEMINI_SUMMARY_MODEL, response.usage_metadata)
+
+        parsed = _clean_json(response.text or "")
+        if not parsed.get("narrative"):
+            raise ValueError("Summary has no narrative")
+    except FutureTimeout:
+        # Left to finish on the pool; a slow answer counts as a failure
+        future.cancel()
+        breaker.record_failure(time.monotonic() - started)
+        FALLBACKS.labels("wrapped_summary", "deadline").inc()
+        logger.warning("Wrapped summary deadline reached")
+        return None
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - started)
+        FALLBACKS.labels("wrapped_summary", "error").inc()
+        logger.warning("Wrapped summary failed", extra={"error": str(e)})
+        return None
+
+    breaker.record_success(time.monotonic() - started)
+    return {
+        "title": parsed.get("title") or "Your story so far",
+        "narrative": parsed["narrative"]
+    }
 
 
 def analyze_community_story(text: str) -> dict:
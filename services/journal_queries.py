@@ -0,0 +1,28 @@
+from services.firebase import get_db
+
+# -------------------------------------------------
+# Fields each read path actually uses. Journal bodies (content,
+# reflection) are never downloaded by analytics queries.
+# -------------------------------------------------
+DASHBOARD_FIELDS = ("created_at", "sentiment_scores", "flagged", "key_phrases", "themes")
+WRAPPED_FIELDS = ("created_at", "sentiment_scores", "risk_score", "themes")
+
+JOURNAL_PROJECTIONS = {
+    # Dashboard and Wrapped read rollups; only their rebuild reads journals
+    # enrichment_status lets the rebuild skip entries still pending
+    "rollups": tuple(sorted(set(DASHBOARD_FIELDS) | set(WRAPPED_FIELDS) | {"enrichment_status"})),
+    "session_index": ("uid", "session_id", "title", "created_at"),
+    "owners": ("uid",),
+}
+
+
+def journals_query(view: str, uid: str = None, db=None):
+    """
+    Journals query projected to the fields `view` declares,
+    optionally narrowed to one user. Pass the async client as `db`
+    for a query usable from async routes.
+    """
+    query = (db or get_db()).collection("journals")
+    if uid is not None:
+        query = query.where("uid", "==", uid)
+    return query.select(list(JOURNAL_PROJECTIONS[view]))
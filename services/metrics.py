@@ -0,0 +1,82 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# -------------------------------------------------
+# Latency
+# -------------------------------------------------
+REQUEST_LATENCY = Histogram(
+    "anchor_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+EXTERNAL_CALL_LATENCY = Histogram(
+    "anchor_external_call_duration_seconds",
+    "Latency of calls to external services",
+    ["dependency", "operation", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 12, 20)
+)
+
+AI_STAGE_LATENCY = Histogram(
+    "anchor_ai_stage_duration_seconds",
+    "Time from fan-out until each journal AI stage finished",
+    ["stage", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 12, 20)
+)
+
+# -------------------------------------------------
+# Degradation and efficiency
+# -------------------------------------------------
+FALLBACKS = Counter(
+    "anchor_fallbacks_total",
+    "Built-in fallback results served instead of a real one",
+    ["stage", "reason"]
+)
+
+FAILOVER_HOPS = Counter(
+    "anchor_gemini_failover_hops_total",
+    "Additional Gemini models tried for one request",
+    ["reason"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "anchor_cache_lookups_total",
+    "In-process and Firestore-backed cache lookups",
+    ["cache", "result"]
+)
+
+GEMINI_TOKENS = Counter(
+    "anchor_gemini_tokens_total",
+    "Gemini tokens by model; prompt includes cached",
+    ["model", "kind"]
+)
+
+BULKHEAD_REJECTIONS = Counter(
+    "anchor_bulkhead_rejections_total",
+    "Calls refused because a dependency's bulkhead was full",
+    ["bulkhead"]
+)
+
+
+@contextmanager
+def track_call(dependency: str, operation: str):
+    """
+    Time one external call; outcome is "error" if the block raises.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(dependency, operation, outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+def metrics_payload():
+    """
+    (body, content type) for the /metrics endpoint.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
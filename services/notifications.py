@@ -1,4 +1,4 @@
-from services.firebase import firebase_auth
+from services.firebase import init_app
 import os
 from dotenv import load_dotenv
 
@@ -9,6 +9,7 @@ def send_notification(title: str, body: str, topic: str = TOPIC):
     """
     Send a notification to all users subscribed to the topic.
     """
+    init_app()
     from firebase_admin import messaging
 
     message = messaging.Message(
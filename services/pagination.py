@@ -0,0 +1,57 @@
+import base64
+import binascii
+from services.metrics import track_call
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(doc_id: str) -> str:
+    return base64.urlsafe_b64encode(doc_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def paginate(query, collection_ref, limit: int, cursor: str = None):
+    """
+    One page of an ordered query, resuming after the document named by
+    an opaque cursor. Returns (docs, next_cursor); next_cursor is None
+    on the last page. Raises ValueError for a bad or stale cursor.
+    """
+    with track_call("firestore", "query_page"):
+        if cursor:
+            snapshot = collection_ref.document(decode_cursor(cursor)).get()
+            if not snapshot.exists:
+                raise ValueError("Invalid cursor")
+            query = query.start_after(snapshot)
+
+        # One extra document tells us whether another page exists
+        docs = list(query.limit(limit + 1).stream())
+
+    if len(docs) > limit:
+        return docs[:limit], encode_cursor(docs[limit - 1].id)
+    return docs, None
+
+
+async def paginate_async(query, collection_ref, limit: int, cursor: str = None):
+    """
+    paginate() for queries built on the async Firestore client.
+    """
+    with track_call("firestore", "query_page"):
+        if cursor:
+            snapshot = await collection_ref.document(decode_cursor(cursor)).get()
+            if not snapshot.exists:
+                raise ValueError("Invalid cursor")
+            query = query.start_after(snapshot)
+
+        docs = [doc async for doc in query.limit(limit + 1).stream()]
+
+    if len(docs) > limit:
+        return docs[:limit], encode_cursor(docs[limit - 1].id)
+    return docs, None
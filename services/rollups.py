@@ -0,0 +1,318 @@
+import os
+import sys
+import bisect
+import logging
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.firebase import get_db
+from services.journal_queries import journals_query
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_ROLLUPS = "dashboard_rollups"
+# One document per user per UTC day, id "{uid}_{YYYY-MM-DD}"
+DAILY_ROLLUPS = "journal_daily_rollups"
+
+HIGH_RISK_THRESHOLD = 0.5
+
+# Bounded top-k: only the most frequent terms are kept per user
+TOP_TERMS_CAPACITY = int(os.getenv("ROLLUP_TOP_TERMS_CAPACITY", "50"))
+# Most recent mood points kept for the dashboard trend
+MOOD_SERIES_LIMIT = int(os.getenv("ROLLUP_MOOD_SERIES_LIMIT", "365"))
+
+
+def mood_score(journal: dict) -> float:
+    """
+    Normalize sentiment: -1 → 0, 0 → 50, +1 → 100
+    """
+    scores = journal.get("sentiment_scores") or {}
+    positive = scores.get("positive", 0)
+    negative = scores.get("negative", 0)
+    return round((positive - negative + 1) * 50, 2)
+
+
+def wrapped_mood_score(journal: dict) -> int:
+    """
+    Wrapped's integer 0–100 mood score for a single entry.
+    """
+    scores = journal.get("sentiment_scores") or {}
+    raw_score = scores.get("positive", 0.0) - scores.get("negative", 0.0)
+    return int((raw_score + 1) * 50)
+
+
+def as_utc(value):
+    """
+    Firestore returns aware UTC datetimes while new entries carry a naive
+    utcnow(); normalize so the two can be compared.
+    """
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _empty_rollup(uid: str) -> dict:
+    return {
+        "uid": uid,
+        "total_journals": 0,
+        "sentiment_sum": 0.0,
+        "last_journal_at": None,
+        "risk_alert": False,
+        "keyword_counts": [],
+        "theme_counts": [],
+        "mood_series": []
+    }
+
+
+def _bump_terms(counts: list, terms: list) -> list:
+    """
+    counts is a list of {"term", "count"}, most frequent first.
+    Stored as a list rather than a map so any phrase is a safe key.
+
+    Space-Saving top-k: once full, a new term replaces the least frequent
+    one and inherits its count, so a term that starts recurring late can
+    still climb past old one-off terms instead of being cut every time.
+    """
+    merged = {item["term"]: item["count"] for item in counts}
+    for term in terms or []:
+        if not term:
+            continue
+        if term in merged or len(merged) < TOP_TERMS_CAPACITY:
+            merged[term] = merged.get(term, 0) + 1
+        else:
+            evicted = min(merged, key=merged.get)
+            merged[term] = merged.pop(evicted) + 1
+
+    ranked = sorted(merged.items(), key=lambda kv: kv[1], reverse=True)
+    return [
+        {"term": term, "count": count}
+        for term, count in ranked[:TOP_TERMS_CAPACITY]
+    ]
+
+
+def apply_journal(rollup: dict, journal: dict) -> dict:
+    """
+    Fold one journal into a dashboard rollup.
+    """
+    created_at = as_utc(journal.get("created_at"))
+    score = mood_score(journal)
+
+    rollup["total_journals"] += 1
+    rollup["sentiment_sum"] += score
+
+    if created_at and (rollup["last_journal_at"] is None or created_at > rollup["last_journal_at"]):
+        rollup["last_journal_at"] = created_at
+
+    rollup["risk_alert"] = rollup["risk_alert"] or bool(journal.get("flagged", False))
+    rollup["keyword_counts"] = _bump_terms(rollup["keyword_counts"], journal.get("key_phrases"))
+    rollup["theme_counts"] = _bump_terms(rollup["theme_counts"], journal.get("themes"))
+
+    if created_at:
+        # Background enrichment can finish out of order, so insert sorted
+        series = rollup["mood_series"]
+        dates = [point["date"] for point in series]
+        series.insert(bisect.bisect_right(dates, created_at), {"date": created_at, "score": score})
+        del series[:-MOOD_SERIES_LIMIT]
+
+    return rollup
+
+
+def _empty_bucket(uid: str, day) -> dict:
+    return {
+        "uid": uid,
+        "date": day.isoformat(),
+        "weekday": day.strftime("%A"),
+        "journal_count": 0,
+        "mood_sum": 0,
+        "mood_count": 0,
+        "risk_max": 0.0,
+        "high_risk_count": 0,
+        "theme_counts": []
+    }
+
+
+def apply_journal_to_bucket(bucket: dict, journal: dict) -> dict:
+    """
+    Fold one journal into its daily bucket.
+    """
+    risk_score = journal.get("risk_score", 0.0) or 0.0
+
+    bucket["journal_count"] += 1
+    bucket["mood_sum"] += wrapped_mood_score(journal)
+    bucket["mood_count"] += 1
+    bucket["risk_max"] = max(bucket["risk_max"], risk_score)
+    if risk_score >= HIGH_RISK_THRESHOLD:
+        bucket["high_risk_count"] += 1
+    bucket["theme_counts"] = _bump_terms(bucket["theme_counts"], journal.get("themes"))
+    return bucket
+
+
+def bucket_id(uid: str, day) -> str:
+    return f"{uid}_{day.isoformat()}"
+
+
+def _record_in_transaction(transaction, rollup_ref, bucket_ref, uid: str, day, journal: dict) -> bool:
+    """
+    Returns False, writing nothing, if the user has no rollup yet.
+    """
+    # Transactions need every read before the first write
+    rollup_snapshot = rollup_ref.get(transaction=transaction)
+    bucket_snapshot = bucket_ref.get(transaction=transaction) if bucket_ref else None
+
+    if not rollup_snapshot.exists:
+        return False
+
+    transaction.set(rollup_ref, apply_journal(rollup_snapshot.to_dict(), journal))
+
+    if bucket_ref:
+        bucket = bucket_snapshot.to_dict() if bucket_snapshot.exists else _empty_bucket(uid, day)
+        transaction.set(bucket_ref, apply_journal_to_bucket(bucket, journal))
+    return True
+
+
+def record_journal(uid: str, journal: dict):
+    """
+    Update the user's dashboard rollup and daily bucket for a newly
+    enriched (and already stored) journal. A user without a rollup gets
+    a full rebuild instead, so history from before rollups is counted.
+    Failures are logged, not raised: the rebuild job repairs any drift.
+    """
+    db = get_db()
+    rollup_ref = db.collection(DASHBOARD_ROLLUPS).document(uid)
+
+    created_at = as_utc(journal.get("created_at"))
+    day = created_at.date() if created_at else None
+    bucket_ref = db.collection(DAILY_ROLLUPS).document(bucket_id(uid, day)) if day else None
+
+    try:
+        # Imported here so the Firestore SDK loads on first use, not at startup
+        from google.cloud import firestore
+        with track_call("firestore", "rollup_txn"):
+            recorded = firestore.transactional(_record_in_transaction)(
+                db.transaction(), rollup_ref, bucket_ref, uid, day, journal
+            )
+        if not recorded:
+            rebuild_rollups(uid)
+    except Exception as e:
+        logger.warning("Rollup update failed", extra={"uid": uid, "error": str(e)})
+
+
+def dashboard_summary(rollup: dict) -> dict:
+    """
+    Shape a rollup document as the /dashboard/overview response.
+    """
+    total = rollup.get("total_journals", 0)
+    if not total:
+        return {
+            "total_journals": 0,
+            "last_journal_at": None,
+            "average_sentiment": None,
+            "mood_trend": [],
+            "risk_alert": False,
+            "top_keywords": [],
+            "top_themes": []
+        }
+
+    last_journal_at = rollup.get("last_journal_at")
+
+    return {
+        "total_journals": total,
+        "last_journal_at": last_journal_at.isoformat() if last_journal_at else None,
+        "average_sentiment": round(rollup["sentiment_sum"] / total, 2),
+        "mood_trend": [
+            {"date": point["date"].isoformat(), "score": point["score"]}
+            for point in rollup.get("mood_series", [])
+        ],
+        "risk_alert": rollup.get("risk_alert", False),
+        "top_keywords": [item["term"] for item in rollup.get("keyword_counts", [])[:5]],
+        "top_themes": [item["term"] for item in rollup.get("theme_counts", [])[:5]]
+    }
+
+
+# -------------------------------------------------
+# Rebuild (repairs drift, backfills existing users)
+# -------------------------------------------------
+def rebuild_rollups(uid: str) -> dict:
+    """
+    Recompute a user's dashboard rollup and daily buckets from their
+    journals and overwrite them.
+    """
+    db = get_db()
+
+    docs = (
+        journals_query("rollups", uid)
+        .order_by("created_at")
+        .stream()
+    )
+
+    rollup = _empty_rollup(uid)
+    buckets = {}
+    for doc in docs:
+        journal = doc.to_dict()
+        if journal.get("enrichment_status") == "pending":
+            # record_journal counts it once enrichment finishes
+            continue
+        apply_journal(rollup, journal)
+
+        day = as_utc(journal["created_at"]).date()
+        bucket = buckets.setdefault(day, _empty_bucket(uid, day))
+        apply_journal_to_bucket(bucket, journal)
+
+    rollup["rebuilt_at"] = datetime.utcnow()
+
+    # Overwrite rebuilt days, drop buckets for days that no longer have entries
+    rebuilt_ids = {bucket_id(uid, day) for day in buckets}
+    stale = [
+        doc.reference
+        for doc in db.collection(DAILY_ROLLUPS).where("uid", "==", uid).select([]).stream()
+        if doc.id not in rebuilt_ids
+    ]
+
+    writes = [
+        (db.collection(DAILY_ROLLUPS).document(bucket_id(uid, day)), bucket)
+        for day, bucket in buckets.items()
+    ]
+    writes += [(ref, None) for ref in stale]
+    writes.append((db.collection(DASHBOARD_ROLLUPS).document(uid), rollup))
+
+    # Firestore batches are capped at 500 writes
+    for start in range(0, len(writes), 500):
+        batch = db.batch()
+        for ref, data in writes[start:start + 500]:
+            if data is None:
+                batch.delete(ref)
+            else:
+                batch.set(ref, data)
+        batch.commit()
+
+    return rollup
+
+
+def rebuild_all_rollups():
+    """
+    Rebuild rollups and daily buckets for every user with journals.
+    """
+    uids = set()
+    for doc in journals_query("owners").stream():
+        uid = doc.to_dict().get("uid")
+        if uid:
+            uids.add(uid)
+
+    for uid in sorted(uids):
+        rebuild_rollups(uid)
+        logger.info("Rebuilt rollups", extra={"uid": uid})
+
+
+if __name__ == "__main__":
+    # python -m services.rollups [uid ...]
+    from services.logs import configure_logging
+    configure_logging()
+
+    if len(sys.argv) > 1:
+        for target_uid in sys.argv[1:]:
+            rebuild_rollups(target_uid)
+    else:
+        rebuild_all_rollups()
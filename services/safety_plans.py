@@ -0,0 +1,52 @@
+import os
+from copy import deepcopy
+from typing import Optional
+
+from services.firebase import get_async_db
+from services.cache import TTLCache
+from services.metrics import track_call
+
+SAFETY_PLANS = "safety_plans"
+
+# Plans are written through on save, so the TTL only bounds staleness
+# from writes made by other worker processes. Keep it short: this copy
+# is what a user in crisis is shown
+_plan_cache = TTLCache(
+    maxsize=int(os.getenv("SAFETY_PLAN_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("SAFETY_PLAN_CACHE_TTL", "60")),
+    name="safety_plans"
+)
+
+_MISSING = object()
+
+
+async def get_safety_plan(uid: str, cached: bool = True) -> Optional[dict]:
+    """
+    The user's safety plan, or None if they have not made one.
+    Served from memory after the first read unless `cached` is False.
+    """
+    plan = _plan_cache.get(uid, _MISSING) if cached else _MISSING
+    if plan is _MISSING:
+        with track_call("firestore", "get_safety_plan"):
+            doc = await get_async_db().collection(SAFETY_PLANS).document(uid).get()
+        plan = doc.to_dict() if doc.exists else None
+        # "No plan" is never cached: a plan saved on another worker
+        # must show up on the very next crisis visit
+        if plan is None:
+            _plan_cache.pop(uid)
+        else:
+            _plan_cache.set(uid, plan)
+    return deepcopy(plan)
+
+
+async def save_safety_plan(uid: str, plan: dict):
+    """
+    Store a plan and refresh the cache with it.
+    """
+    with track_call("firestore", "set_safety_plan"):
+        await get_async_db().collection(SAFETY_PLANS).document(uid).set(plan)
+    _plan_cache.set(uid, deepcopy(plan))
+
+
+def cache_stats() -> dict:
+    return _plan_cache.stats()
@@ -0,0 +1,213 @@
+import sys
+import logging
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.firebase import get_db, firestore_bulkhead
+from services.cache import TTLCache
+from services.journal_queries import journals_query
+from services.rollups import as_utc
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+# One small document per journaling session, id "{uid}_{session_id}"
+JOURNAL_SESSIONS = "journal_sessions"
+# One marker per user whose legacy journals are in the index, id "{uid}"
+SESSION_BACKFILLS = "journal_session_backfills"
+
+# Users whose marker has been seen, so the check is not a read per request
+_backfilled = TTLCache(maxsize=10000, ttl=3600)
+
+
+def session_doc_id(uid: str, session_id: str) -> str:
+    return f"{uid}_{session_id}"
+
+
+def session_title(title: str) -> str:
+    # ✅ Treat "Journal reflection" as empty
+    if not title or title.strip().lower() == "journal reflection":
+        return ""
+    return title[:40]
+
+
+def _record_in_transaction(transaction, ref, uid: str, session_id: str, title: str, created_at):
+    snapshot = ref.get(transaction=transaction)
+
+    if not snapshot.exists:
+        transaction.set(ref, {
+            "uid": uid,
+            "session_id": session_id,
+            "title": title,
+            "first_at": created_at,
+            "last_at": created_at,
+            "message_count": 1
+        })
+        return
+
+    session = snapshot.to_dict()
+    update = {"message_count": session.get("message_count", 0) + 1}
+
+    if created_at > as_utc(session["last_at"]):
+        update["last_at"] = created_at
+    if created_at < as_utc(session["first_at"]):
+        # The earliest message names the session
+        update["first_at"] = created_at
+        update["title"] = title or session.get("title", "")
+
+    transaction.update(ref, update)
+
+
+def record_session_message(uid: str, session_id: str, title: str, created_at):
+    """
+    Fold a newly written journal into its session's index entry.
+    Failures are logged; backfill_session_index repairs the index.
+    """
+    db = get_db()
+    ref = db.collection(JOURNAL_SESSIONS).document(session_doc_id(uid, session_id))
+
+    try:
+        from google.cloud import firestore
+        with track_call("firestore", "session_index_txn"):
+            firestore.transactional(_record_in_transaction)(
+                db.transaction(), ref, uid, session_id,
+                session_title(title), as_utc(created_at)
+            )
+    except Exception as e:
+        logger.warning(
+            "Session index update failed",
+            extra={"uid": uid, "session_id": session_id, "error": str(e)}
+        )
+
+
+def sessions_query(uid: str, db=None):
+    """
+    A user's sessions, newest first by their first message.
+    """
+    return (
+        (db or get_db()).collection(JOURNAL_SESSIONS)
+        .where("uid", "==", uid)
+        .order_by("first_at", direction="DESCENDING")
+    )
+
+
+def session_out(data: dict) -> dict:
+    return {
+        "session_id": data["session_id"],
+        "title": data.get("title", ""),
+        "created_at": data.get("first_at"),
+        "last_at": data.get("last_at"),
+        "message_count": data.get("message_count", 0)
+    }
+
+
+# -------------------------------------------------
+# Backfill (folds in legacy journals without session_id)
+# -------------------------------------------------
+def backfill_session_index(uid: str = None) -> int:
+    """
+    Rebuild index entries from journals, for one user or everyone.
+    Returns the number of sessions written.
+    """
+    db = get_db()
+
+    sessions = {}
+    untitled = {}
+    for doc in journals_query("session_index", uid).stream():
+        data = doc.to_dict()
+        owner = data.get("uid")
+        created_at = as_utc(data.get("created_at"))
+        if not owner or not created_at:
+            continue
+
+        # Legacy docs with no session_id: use doc.id as session key
+        sid = data.get("session_id") or doc.id
+        key = (owner, sid)
+        title = session_title(data.get("title", ""))
+
+        session = sessions.get(key)
+        if session is None:
+            sessions[key] = {
+                "uid": owner,
+                "session_id": sid,
+                "title": title,
+                "first_at": created_at,
+                "last_at": created_at,
+                "message_count": 1
+            }
+            if not title:
+                untitled[key] = doc.reference
+            continue
+
+        session["message_count"] += 1
+        session["last_at"] = max(session["last_at"], created_at)
+        if created_at < session["first_at"]:
+            session["first_at"] = created_at
+            session["title"] = title
+            untitled.pop(key, None)
+            if not title:
+                untitled[key] = doc.reference
+
+    # Content is only fetched for sessions whose first message has no title
+    if untitled:
+        key_by_path = {ref.path: key for key, ref in untitled.items()}
+        for doc in db.get_all(list(untitled.values()), field_paths=["content"]):
+            if doc.exists:
+                sessions[key_by_path[doc.reference.path]]["title"] = (doc.get("content") or "")[:40]
+
+    now = datetime.utcnow()
+    writes = [
+        (
+            db.collection(JOURNAL_SESSIONS).document(session_doc_id(session["uid"], session["session_id"])),
+            {**session, "backfilled_at": now}
+        )
+        for session in sessions.values()
+    ]
+    # Markers go last, so a user is only marked once their entries are in
+    owners = {uid} if uid is not None else {session["uid"] for session in sessions.values()}
+    writes += [
+        (db.collection(SESSION_BACKFILLS).document(owner), {"uid": owner, "backfilled_at": now})
+        for owner in sorted(owners)
+    ]
+
+    for start in range(0, len(writes), 500):
+        batch = db.batch()
+        for ref, data in writes[start:start + 500]:
+            batch.set(ref, data)
+        batch.commit()
+
+    return len(sessions)
+
+
+async def ensure_session_index(uid: str, db) -> bool:
+    """
+    Backfill the user's index once, tracked by a per-user marker rather
+    than an empty index: entries written since the rollout must not hide
+    older sessions. Returns True if a backfill ran.
+    """
+    if _backfilled.get(uid):
+        return False
+
+    with track_call("firestore", "session_backfill_get"):
+        marker = await db.collection(SESSION_BACKFILLS).document(uid).get()
+
+    ran = not marker.exists
+    if ran:
+        await firestore_bulkhead.run(backfill_session_index, uid)
+    _backfilled.set(uid, True)
+    return ran
+
+
+if __name__ == "__main__":
+    # python -m services.sessions [uid ...]
+    from services.logs import configure_logging
+    configure_logging()
+
+    if len(sys.argv) > 1:
+        for target_uid in sys.argv[1:]:
+            count = backfill_session_index(target_uid)
+            logger.info("Backfilled sessions", extra={"uid": target_uid, "sessions": count})
+    else:
+        logger.info("Backfilled sessions", extra={"sessions": backfill_session_index()})
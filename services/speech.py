@@ -1,11 +1,18 @@
 import os
+import logging
 from dotenv import load_dotenv
+from services.bulkheads import bulkhead
+from services.metrics import track_call
 
 load_dotenv()
 
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
 
+_bulkhead = bulkhead("speech", max_workers=4, max_queue=8)
+
+logger = logging.getLogger(__name__)
+
 def speech_to_text(audio_bytes: bytes) -> str:
     """
     Converts speech audio to text using Azure Speech.
@@ -27,12 +34,13 @@ def speech_to_text(audio_bytes: bytes) -> str:
             audio_config=audio_config
         )
 
-        result = recognizer.recognize_once()
+        with track_call("speech", "recognize"):
+            result = _bulkhead.submit(recognizer.recognize_once).result()
 
         return result.text if result.text else ""
 
     except Exception as e:
-        print("Speech to text failed:", e)
+        logger.warning("Speech to text failed", extra={"error": str(e)})
         return ""
 
 
@@ -56,9 +64,10 @@ def text_to_speech(text: str) -> bytes:
             audio_config=None
         )
 
-        result = synthesizer.speak_text_async(text).get()
+        with track_call("speech", "synthesize"):
+            result = _bulkhead.submit(lambda: synthesizer.speak_text_async(text).get()).result()
         return result.audio_data
 
     except Exception as e:
-        print("Text to speech failed:", e)
+        logger.warning("Text to speech failed", extra={"error": str(e)})
         return b""
\ No newline at end of file
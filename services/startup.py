@@ -0,0 +1,35 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# step name -> seconds, in the order steps finished
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def timed(step: str):
+    """
+    Record how long a module import or client construction took.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _timings_lock:
+            _timings[step] = round(elapsed, 4)
+
+
+def startup_report() -> dict:
+    with _timings_lock:
+        return dict(_timings)
+
+
+def log_startup_report():
+    report = startup_report()
+    slowest = sorted(report.items(), key=lambda item: -item[1])
+    logger.info("Startup timings", extra={"timings_seconds": dict(slowest)})
@@ -0,0 +1,244 @@
+import sys
+import json
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.firebase import get_db
+from services.gemini import generate_summary
+from services.rollups import DAILY_ROLLUPS
+from services.metrics import CACHE_LOOKUPS, track_call
+
+logger = logging.getLogger(__name__)
+
+WRAPPED_SUMMARIES = "wrapped_summaries"
+
+SUMMARY_FALLBACK = {
+    "title": "Your story so far",
+    "narrative": (
+        "You kept coming back to your journal, and that matters. "
+        "Each entry is a small act of noticing what you carry. "
+        "Whatever this stretch held, you gave it words — and that is where the next chapter begins."
+    )
+}
+
+MIN_WRAPPED_JOURNALS = 3
+MAX_WRAPPED_DAYS = 366
+
+
+def load_buckets(uid: str, start: date, end: date) -> list:
+    """
+    Daily buckets for start..end inclusive, oldest first.
+    """
+    db = get_db()
+
+    query = (
+        db.collection(DAILY_ROLLUPS)
+        .where("uid", "==", uid)
+        .where("date", ">=", start.isoformat())
+        .where("date", "<=", end.isoformat())
+        .order_by("date")
+    )
+    with track_call("firestore", "daily_buckets"):
+        return [doc.to_dict() for doc in query.stream()]
+
+
+def mood_label(score: int) -> str:
+    if score <= 30:
+        return "Struggling"
+    elif score <= 50:
+        return "Heavy"
+    elif score <= 70:
+        return "Steady"
+    elif score <= 85:
+        return "Positive"
+    return "Thriving"
+
+
+def wrapped_stats(buckets: list) -> dict:
+    """
+    Merge daily buckets (oldest first) into the Wrapped statistics.
+    """
+    total_journals = sum(b["journal_count"] for b in buckets)
+    active_days = len(buckets)
+
+    # -----------------------------
+    # Mood scoring
+    # -----------------------------
+    mood_trend = [
+        {
+            "date": b["date"],
+            "score": int(b["mood_sum"] / b["mood_count"])
+        }
+        for b in buckets
+        if b.get("mood_count")
+    ]
+
+    average_mood_score = int(
+        sum(item["score"] for item in mood_trend) / len(mood_trend)
+    ) if mood_trend else 0
+
+    # -----------------------------
+    # Emotional themes
+    # -----------------------------
+    themes = Counter()
+    for b in buckets:
+        for item in b.get("theme_counts", []):
+            themes[item["term"]] += item["count"]
+
+    top_themes = [theme for theme, _ in themes.most_common(3)]
+
+    # -----------------------------
+    # Safety snapshot
+    # -----------------------------
+    high_risk_entries = sum(b.get("high_risk_count", 0) for b in buckets)
+    max_risk_score = round(max((b.get("risk_max", 0.0) for b in buckets), default=0.0), 2)
+
+    # -----------------------------
+    # Highlights
+    # -----------------------------
+    day_counts = Counter()
+    for b in buckets:
+        day_counts[b["weekday"]] += b["journal_count"]
+    most_active_day = day_counts.most_common(1)[0][0] if day_counts else None
+
+    # longest streak
+    dates = [date.fromisoformat(b["date"]) for b in buckets]
+
+    longest_streak = current = 1 if dates else 0
+    for i in range(1, len(dates)):
+        if (dates[i] - dates[i - 1]).days == 1:
+            current += 1
+            longest_streak = max(longest_streak, current)
+        else:
+            current = 1
+
+    return {
+        "total_journals": total_journals,
+        "active_days": active_days,
+        "mood_trend": mood_trend,
+        "average_mood_score": average_mood_score,
+        "mood_label": mood_label(average_mood_score),
+        "top_themes": top_themes,
+        "high_risk_entries": high_risk_entries,
+        "max_risk_score": max_risk_score,
+        "most_active_day": most_active_day,
+        "longest_streak": longest_streak
+    }
+
+
+def resolve_period(today: date, days: int, start: date = None, end: date = None):
+    """
+    (start, end, label, key) for a trailing window or a custom range.
+    The trailing window ends at `end` when only `end` is given.
+    key identifies the period for the summary cache.
+    Raises ValueError for an invalid or oversized range.
+    """
+    if start is None and end is not None:
+        start = end - timedelta(days=days)
+        label = f"{days} Days to {end.isoformat()}"
+        key = f"last_{days}d_{end.isoformat()}"
+    elif start is None:
+        end = today
+        start = today - timedelta(days=days)
+        label = f"Last {days} Days"
+        key = f"last_{days}d"
+    else:
+        end = end or today
+        label = f"{start.isoformat()} to {end.isoformat()}"
+        key = f"{start.isoformat()}_{end.isoformat()}"
+
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days > MAX_WRAPPED_DAYS:
+        raise ValueError(f"Wrapped covers at most {MAX_WRAPPED_DAYS} days")
+
+    return start, end, label, key
+
+
+# -------------------------------------------------
+# AI summaries, cached per user per period
+# -------------------------------------------------
+def _summary_inputs_hash(period: str, stats: dict) -> str:
+    inputs = {
+        "period": period,
+        **{
+            field: stats[field]
+            for field in (
+                "total_journals",
+                "active_days",
+                "average_mood_score",
+                "mood_label",
+                "top_themes",
+                "high_risk_entries"
+            )
+        }
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def wrapped_summary(uid: str, period_key: str, period: str, stats: dict) -> dict:
+    """
+    Cached Wrapped summary. Only regenerated when the statistics the
+    summary is written from have changed; fallbacks are never cached.
+    """
+    db = get_db()
+    ref = db.collection(WRAPPED_SUMMARIES).document(f"{uid}_{period_key}")
+    inputs_hash = _summary_inputs_hash(period, stats)
+
+    with track_call("firestore", "wrapped_summary_get"):
+        doc = ref.get()
+    if doc.exists and doc.to_dict().get("inputs_hash") == inputs_hash:
+        CACHE_LOOKUPS.labels("wrapped_summary", "hit").inc()
+        return doc.to_dict()["summary"]
+
+    CACHE_LOOKUPS.labels("wrapped_summary", "miss").inc()
+
+    summary = generate_summary(period, stats)
+    if summary is None:
+        return dict(SUMMARY_FALLBACK)
+
+    ref.set({
+        "uid": uid,
+        "period_key": period_key,
+        "inputs_hash": inputs_hash,
+        "summary": summary,
+        "generated_at": datetime.utcnow()
+    })
+    return summary
+
+
+def precompute_wrapped_summaries(days: int = 30):
+    """
+    Offline batch: refresh the trailing-window summary for every user
+    who journaled in the window, so GET /wrapped is a cache hit.
+    """
+    db = get_db()
+    start, end, period, period_key = resolve_period(datetime.utcnow().date(), days)
+
+    uids = set()
+    for doc in db.collection(DAILY_ROLLUPS).where("date", ">=", start.isoformat()).stream():
+        uids.add(doc.to_dict()["uid"])
+
+    for uid in sorted(uids):
+        stats = wrapped_stats(load_buckets(uid, start, end))
+        if stats["total_journals"] < MIN_WRAPPED_JOURNALS:
+            continue
+        try:
+            wrapped_summary(uid, period_key, period, stats)
+        except Exception as e:
+            logger.warning("Wrapped summary failed", extra={"uid": uid, "error": str(e)})
+
+    logger.info("Precomputed Wrapped summaries", extra={"active_users": len(uids)})
+
+
+if __name__ == "__main__":
+    # python -m services.wrapped [days]  (run nightly)
+    from services.logs import configure_logging
+    configure_logging()
+
+    precompute_wrapped_summaries(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
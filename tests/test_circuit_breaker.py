@@ -0,0 +1,146 @@
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", window=60, min_calls=2, error_rate=0.5, open_seconds=30)
+
+
+def trip(breaker):
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+
+def half_open(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+
+def test_closed_breaker_allows_every_call(breaker):
+    assert [breaker.acquire() for _ in range(3)] == [0, 0, 0]
+    assert breaker.allow_request()
+
+
+def test_trips_only_after_min_calls(breaker):
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+
+def test_old_failures_leave_the_window(breaker, clock):
+    breaker.record_failure(0.1)
+    clock.advance(61)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_rejects_until_open_seconds(breaker, clock):
+    trip(breaker)
+    clock.advance(29)
+    assert breaker.acquire() is None
+    clock.advance(1)
+    assert breaker.acquire() is not None
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    half_open(breaker, clock)
+    permit = breaker.acquire()
+    assert permit
+    assert breaker.acquire() is None
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(breaker, clock):
+    half_open(breaker, clock)
+    breaker.acquire()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.acquire() == 0
+
+
+def test_failed_probe_reopens(breaker, clock):
+    half_open(breaker, clock)
+    breaker.acquire()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.acquire() is None
+
+
+def test_released_probe_can_be_claimed_again(breaker, clock):
+    half_open(breaker, clock)
+    permit = breaker.acquire()
+    breaker.release(permit)
+    assert breaker.state == HALF_OPEN
+    assert breaker.acquire() is not None
+
+
+def test_releasing_an_old_permit_keeps_the_current_probe(breaker, clock):
+    half_open(breaker, clock)
+    first = breaker.acquire()
+    breaker.release(first)
+    second = breaker.acquire()
+    assert second != first
+
+    breaker.release(first)
+    assert breaker.acquire() is None
+
+    breaker.release(second)
+    assert breaker.acquire() is not None
+
+
+def test_releasing_a_closed_permit_is_a_no_op(breaker, clock):
+    closed_permit = breaker.acquire()
+    half_open(breaker, clock)
+    breaker.acquire()
+
+    breaker.release(closed_permit)
+    assert breaker.acquire() is None
+
+
+def test_unreported_probe_expires_after_open_seconds(breaker, clock):
+    half_open(breaker, clock)
+    stale = breaker.acquire()
+    clock.advance(29)
+    assert breaker.acquire() is None
+
+    clock.advance(1)
+    fresh = breaker.acquire()
+    assert fresh is not None and fresh != stale
+
+    # The expired probe reporting late must not free the new one
+    breaker.release(stale)
+    assert breaker.acquire() is None
+
+
+def test_snapshot_reports_state_and_error_rate(breaker):
+    breaker.record_success(0.2)
+    breaker.record_failure(0.4)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == OPEN
+    assert snapshot["calls"] == 2
+    assert snapshot["error_rate"] == 0.5
+    assert snapshot["avg_latency"] == 0.3
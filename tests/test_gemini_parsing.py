@@ -0,0 +1,116 @@
+import pytest
+
+from services.gemini import _parse_reflection, _salvage_json, _scan_string_field
+
+
+# -------------------------------------------------
+# _scan_string_field (streamed reflection text)
+# -------------------------------------------------
+@pytest.mark.parametrize("raw, expected", [
+    ('{"reflection": "Hel', ("Hel", False)),
+    ('{"reflection": "Hello", "themes"', ("Hello", True)),
+    ('{"reflection":"tight"}', ("tight", True)),
+    ('{"themes": []}', ("", False)),
+])
+def test_scan_reports_text_and_whether_it_closed(raw, expected):
+    assert _scan_string_field(raw, "reflection") == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"reflection": "say \\"hi\\"\\nok"', ('say "hi"\nok', True)),
+    ('{"reflection": "tab\\there"', ("tab\there", True)),
+    ('{"reflection": "back\\\\slash"', ("back\\slash", True)),
+    ('{"reflection": "caf\\u00e9"', ("café", True)),
+])
+def test_scan_decodes_escapes(raw, expected):
+    assert _scan_string_field(raw, "reflection") == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    # Cut right after the backslash
+    ('{"reflection": "ab\\', "ab"),
+    # Cut inside a \\u sequence
+    ('{"reflection": "caf\\u00', "caf"),
+    ('{"reflection": "caf\\u', "caf"),
+])
+def test_scan_stops_before_a_cut_off_escape(raw, expected):
+    assert _scan_string_field(raw, "reflection") == (expected, False)
+
+
+def test_scan_is_stable_as_chunks_arrive():
+    full = '{"reflection": "caf\\u00e9 \\"ok\\"", "themes": []}'
+    seen = ""
+    for end in range(1, len(full) + 1):
+        text, _ = _scan_string_field(full[:end], "reflection")
+        # Emitted text only ever grows, never rewrites what was sent
+        assert text.startswith(seen)
+        seen = text
+    assert seen == 'café "ok"'
+
+
+def test_scan_ignores_the_key_inside_another_value():
+    raw = '{"themes": ["reflection"], "reflection": "real"}'
+    assert _scan_string_field(raw, "reflection") == ("real", True)
+
+
+# -------------------------------------------------
+# _salvage_json (truncated or chatty output)
+# -------------------------------------------------
+def test_salvage_ignores_text_around_the_object():
+    raw = 'Sure! {"reflection": "x", "themes": ["a"]} Hope this helps.'
+    assert _salvage_json(raw) == {"reflection": "x", "themes": ["a"]}
+
+
+def test_salvage_closes_open_containers():
+    raw = '{"reflection": "x", "themes": ["a"'
+    assert _salvage_json(raw) == {"reflection": "x", "themes": ["a"]}
+
+
+def test_salvage_drops_a_cut_off_string_member():
+    raw = '{"reflection": "x", "themes": ["a"], "follow_up_question": "why'
+    assert _salvage_json(raw) == {"reflection": "x", "themes": ["a"]}
+
+
+def test_salvage_drops_a_cut_off_key():
+    raw = '{"reflection": "x", "themes": ["a"], "follow_up'
+    assert _salvage_json(raw) == {"reflection": "x", "themes": ["a"]}
+
+
+def test_salvage_drops_a_cut_off_escape():
+    raw = '{"reflection": "x", "follow_up_question": "a\\'
+    assert _salvage_json(raw) == {"reflection": "x"}
+
+
+def test_salvage_keeps_braces_inside_strings():
+    raw = '{"reflection": "a } b { c", "themes": ["d'
+    assert _salvage_json(raw)["reflection"] == "a } b { c"
+
+
+def test_salvage_without_an_object_raises():
+    with pytest.raises(ValueError):
+        _salvage_json("no json here")
+
+
+# -------------------------------------------------
+# _parse_reflection
+# -------------------------------------------------
+def test_parse_accepts_fenced_json():
+    raw = '```json\n{"reflection": "x", "themes": [], "follow_up_question": "q"}\n```'
+    assert _parse_reflection(raw) == {"reflection": "x", "themes": [], "follow_up_question": "q"}
+
+
+def test_parse_salvages_when_the_reflection_is_complete():
+    raw = '{"reflection": "x", "themes": ["a"'
+    assert _parse_reflection(raw) == {"reflection": "x", "themes": ["a"]}
+
+
+@pytest.mark.parametrize("raw", [
+    # The reflection itself was cut off
+    '{"reflection": "cut off',
+    '{"reflection": "  ", "themes": []}',
+    '{"themes": ["a"]}',
+    '["reflection"]',
+])
+def test_parse_rejects_output_without_a_usable_reflection(raw):
+    with pytest.raises(ValueError):
+        _parse_reflection(raw)